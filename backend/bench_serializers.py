@@ -0,0 +1,154 @@
+"""Micro-benchmark of list serialization before and after the batch serializers.
+
+Run with: python bench_serializers.py [rows]
+
+Rows are plain in-memory objects, so no database is touched. The "before"
+functions reproduce the per-row to_dict implementations the serializers
+replaced, each followed by the stdlib JSON encoding jsonify used.
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import roadmap_progress
+import serializers
+
+TITLES = ["JavaScript", "Python", "Java", "C++", "HTML/CSS", "React", "Node.js", "SQL", "Go"]
+
+
+def legacy_quiz_to_dict(quiz):
+    time_diff = datetime.utcnow() - quiz.created_at
+    days_ago = time_diff.days
+    time_ago = f"{days_ago} days ago" if days_ago > 0 else "Today"
+    icon_map = {
+        "JavaScript": "<Code className=\"text-yellow-500\" size={16} />",
+        "Python": "<Code className=\"text-blue-600\" size={16} />",
+        "Java": "<Code className=\"text-orange-500\" size={16} />",
+        "C++": "<Code className=\"text-purple-500\" size={16} />",
+        "HTML/CSS": "<Code className=\"text-green-500\" size={16} />",
+        "React": "<Code className=\"text-blue-400\" size={16} />",
+        "Node.js": "<Code className=\"text-green-600\" size={16} />",
+        "SQL": "<Database className=\"text-blue-500\" size={16} />",
+    }
+    color_map = {
+        "JavaScript": {"bg": "bg-yellow-100", "text": "text-yellow-600"},
+        "Python": {"bg": "bg-blue-100", "text": "text-blue-600"},
+        "Java": {"bg": "bg-orange-100", "text": "text-orange-600"},
+        "C++": {"bg": "bg-purple-100", "text": "text-purple-600"},
+        "HTML/CSS": {"bg": "bg-green-100", "text": "text-green-600"},
+        "React": {"bg": "bg-blue-100", "text": "text-blue-400"},
+        "Node.js": {"bg": "bg-green-100", "text": "text-green-600"},
+        "SQL": {"bg": "bg-blue-100", "text": "text-blue-500"},
+    }
+    return {
+        "title": quiz.title,
+        "icon": icon_map.get(quiz.title, "<Code className=\"text-gray-500\" size={16} />"),
+        "bgColor": color_map.get(quiz.title, {"bg": "bg-gray-100"})["bg"],
+        "textColor": color_map.get(quiz.title, {"text": "text-gray-600"})["text"],
+        "timeAgo": time_ago,
+        "score": quiz.score
+    }
+
+
+def legacy_problem_to_dict(problem):
+    return {
+        "id": problem.id,
+        "title": problem.title,
+        "difficulty": problem.difficulty,
+        "solved": problem.solved,
+        "category": problem.category,
+        "solution": problem.solution,
+        "examplesList": json.loads(problem.examples)
+    }
+
+
+class BenchRoadmap(SimpleNamespace):
+    """Stand-in for Roadmap whose template content is kept as JSON text"""
+
+    def sections(self):
+        return roadmap_progress.apply_progress(
+            json.loads(self.template_json), roadmap_progress.decode_bits(self.completion_bits)
+        )
+
+    def to_dict(self, include_roadmap=True):
+        data = {
+            "id": self.id, "email": self.email, "name": self.name, "icon": self.icon,
+            "color": self.color, "progress": self.progress, "completed": self.completed,
+            "lessons": self.lessons, "description": self.description
+        }
+        if include_roadmap:
+            data["roadmap"] = self.sections()
+        return data
+
+
+def make_rows(count):
+    now = datetime.utcnow()
+    quizzes = [
+        SimpleNamespace(title=TITLES[i % len(TITLES)], score=f"{i % 6}/5", created_at=now - timedelta(hours=i))
+        for i in range(count)
+    ]
+    examples = [
+        json.dumps([{"input": f"nums = [{n}, {n + 1}]", "output": str(n), "explanation": "Example"}] * 3)
+        for n in range(50)
+    ]
+    problems = [
+        SimpleNamespace(id=i, title=f"Problem {i}", difficulty="Easy", solved=bool(i % 2),
+                        category="Arrays", solution="def solve(): pass", examples=examples[i % len(examples)])
+        for i in range(count)
+    ]
+    sections = [
+        {"title": f"Section {s}", "modules": [{"title": f"Module {m}", "completed": False} for m in range(4)]}
+        for s in range(5)
+    ]
+    templates = [json.dumps([{**section, "title": f"{section['title']} v{t}"} for section in sections])
+                 for t in range(20)]
+    roadmaps = [
+        BenchRoadmap(id=i, email="user@example.com", name="Python", icon="Code", color="blue",
+                     progress=0, completed=0, lessons=20, description="Roadmap",
+                     template_id=i % len(templates), template_json=templates[i % len(templates)],
+                     completion_bits=format(i % 4, "x"))
+        for i in range(count)
+    ]
+    return quizzes, problems, roadmaps
+
+
+def measure(label, count, fn, repeat=3):
+    best = min(timed(fn) for _ in range(repeat))
+    print(f"  {label:<7} {count / best:>12,.0f} rows/sec  ({best * 1000:.1f} ms)")
+    return best
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    quizzes, problems, roadmaps = make_rows(count)
+    encoder = "orjson" if serializers.orjson is not None else "json"
+    print(f"Serializing {count:,} rows per list (fast encoder: {encoder})")
+
+    cases = [
+        ("quizzes",
+         lambda: json.dumps([legacy_quiz_to_dict(quiz) for quiz in quizzes]),
+         lambda: serializers.dumps(serializers.serialize_quizzes(quizzes))),
+        ("problems",
+         lambda: json.dumps([legacy_problem_to_dict(problem) for problem in problems]),
+         lambda: serializers.dumps(serializers.serialize_problems(problems))),
+        ("roadmaps",
+         lambda: json.dumps([roadmap.to_dict() for roadmap in roadmaps]),
+         lambda: serializers.dumps(serializers.serialize_roadmaps(roadmaps))),
+    ]
+    for name, before, after in cases:
+        print(f"{name}:")
+        before_time = measure("before", count, before)
+        after_time = measure("after", count, after)
+        print(f"  speedup {before_time / after_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""SQLite-backed caches shared by every worker process of the backend"""
+import json
+import threading
+import time
+
+from sqlalchemy import text
+
+
+class SqlCache:
+    """Persistent key/value cache with TTL expiry and LRU eviction.
+
+    Entries live in their own table of the application database so that all
+    worker processes see the same data. Hit/miss counters are accumulated in
+    memory and flushed to the shared ``cache_counter`` table at most once per
+    ``counter_flush_interval`` seconds, which keeps cache hits read-only.
+    """
+
+    def __init__(self, engine, table, ttl=None, max_entries=None,
+                 touch_interval=60, counter_flush_interval=5):
+        self.engine = engine
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.counter_flush_interval = counter_flush_interval
+        self._lock = threading.Lock()
+        self._pending = {"hits": 0, "misses": 0}
+        self._last_flush = time.time()
+        self._ensure_table()
+
+    def _ensure_table(self):
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "cache_key TEXT PRIMARY KEY, "
+                "payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{self.table}_accessed_at "
+                f"ON {self.table} (accessed_at)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS cache_counter ("
+                "name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)"
+            ))
+
+    def _count(self, name):
+        with self._lock:
+            self._pending[name] += 1
+            due = time.time() - self._last_flush >= self.counter_flush_interval
+        if due:
+            self.flush_counters()
+
+    def flush_counters(self):
+        """Write the locally accumulated hit/miss counts to the shared table"""
+        with self._lock:
+            pending = dict(self._pending)
+            self._pending = {name: 0 for name in pending}
+            self._last_flush = time.time()
+        deltas = {name: value for name, value in pending.items() if value}
+        if not deltas:
+            return
+        with self.engine.begin() as conn:
+            for name, value in deltas.items():
+                conn.execute(text(
+                    "INSERT INTO cache_counter (name, value) VALUES (:name, :value) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + :value"
+                ), {"name": f"{self.table}.{name}", "value": value})
+
+    def _is_expired(self, created_at, now):
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self.engine.connect() as conn:
+            row = conn.execute(text(
+                f"SELECT payload, created_at, accessed_at FROM {self.table} "
+                "WHERE cache_key = :key"
+            ), {"key": key}).first()
+
+        if row is None or self._is_expired(row.created_at, now):
+            if row is not None:
+                self.delete(key)
+            self._count("misses")
+            return None
+
+        # Only refresh the LRU timestamp occasionally so hits stay read-only
+        if now - row.accessed_at >= self.touch_interval:
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    f"UPDATE {self.table} SET accessed_at = :now WHERE cache_key = :key"
+                ), {"now": now, "key": key})
+
+        self._count("hits")
+        return json.loads(row.payload)
+
+    def contains(self, key):
+        """Check whether an unexpired entry exists, without counting a hit or miss"""
+        with self.engine.connect() as conn:
+            created_at = conn.execute(text(
+                f"SELECT created_at FROM {self.table} WHERE cache_key = :key"
+            ), {"key": key}).scalar()
+        return created_at is not None and not self._is_expired(created_at, time.time())
+
+    def put(self, key, value):
+        """Store value under key and evict the least recently used overflow"""
+        now = time.time()
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(cache_key, payload, created_at, accessed_at) "
+                "VALUES (:key, :payload, :now, :now)"
+            ), {"key": key, "payload": json.dumps(value), "now": now})
+
+            if self.ttl is not None:
+                conn.execute(text(
+                    f"DELETE FROM {self.table} WHERE created_at < :cutoff"
+                ), {"cutoff": now - self.ttl})
+
+            if self.max_entries is not None:
+                conn.execute(text(
+                    f"DELETE FROM {self.table} WHERE cache_key IN ("
+                    f"SELECT cache_key FROM {self.table} "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET :keep)"
+                ), {"keep": self.max_entries})
+
+    def delete(self, key):
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"DELETE FROM {self.table} WHERE cache_key = :key"
+            ), {"key": key})
+
+    def clear(self):
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.table}"))
+
+    def stats(self):
+        """Return entry count and hit/miss counters summed over all workers"""
+        self.flush_counters()
+        with self.engine.connect() as conn:
+            entries = conn.execute(text(
+                f"SELECT COUNT(*) FROM {self.table}"
+            )).scalar()
+            rows = conn.execute(text(
+                "SELECT name, value FROM cache_counter WHERE name IN (:hits, :misses)"
+            ), {"hits": f"{self.table}.hits", "misses": f"{self.table}.misses"}).all()
+
+        counters = {name.split(".", 1)[1]: value for name, value in rows}
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,82 @@
+"""Fail if explanation lookups stall while the fuzzy index is being built.
+
+Fills a scratch ``explanation_cache`` table with ``--rows`` entries, then
+times lookups from a fresh ExplanationCache the way a worker's first
+requests would see them: the index is built in the background, so no
+lookup may take longer than ``--max-ms``. Once the index has caught up, a
+near-duplicate title must be found and a title that differs only by its
+number must not. Run from this directory:
+``python check_explanation_lookup.py --rows 20000``
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from explanations import ExplanationCache, explanation_key
+
+VERSION = 1
+
+
+def populate(engine, rows):
+    now = time.time()
+    ExplanationCache(engine, VERSION)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO explanation_cache (cache_key, payload, created_at, accessed_at) "
+            "VALUES (:key, :payload, :now, :now)"
+        ), [{"key": explanation_key(f"Course {n % 50}", f"Module {n} loops", f"Subtopic {n % 7}", VERSION),
+             "payload": json.dumps(f"Explanation {n}"), "now": now + n * 1e-6}
+            for n in range(rows)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="explanation_lookup_") as directory:
+        engine = create_engine("sqlite:///" + os.path.join(directory, "lookup.db"))
+        populate(engine, args.rows)
+        cache = ExplanationCache(engine, VERSION)
+
+        timings = []
+        for n in range(args.lookups):
+            started = time.perf_counter()
+            cache.lookup("Unrelated course", f"Nothing like this {n}", "Anything")
+            timings.append((time.perf_counter() - started) * 1000)
+        slowest = max(timings)
+        print(f"{args.lookups} lookups on {args.rows} rows while indexing: "
+              f"first {timings[0]:.1f} ms, slowest {slowest:.1f} ms")
+
+        started = time.monotonic()
+        cache._warmer.join()
+        print(f"Index built in the background in {time.monotonic() - started:.1f}s more, "
+              f"{cache.stats()['fuzzy']['indexed']} entries")
+        last = args.rows - 1
+        near, similarity = cache.lookup(f"course {last % 50}", f"Module {last} loops!", f"subtopic {last % 7}")
+        numbered, _ = cache.lookup(f"Course {last % 50}", f"Module {last - 1}0 loops", f"Subtopic {last % 7}")
+        engine.dispose()
+
+    failures = []
+    if slowest > args.max_ms:
+        failures.append(f"a lookup took {slowest:.1f} ms (limit {args.max_ms:g} ms)")
+    if near != f"Explanation {last}":
+        failures.append("the near-duplicate title was not found")
+    if numbered is not None:
+        failures.append("a title with a different number was served")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print(f"ok near duplicate found with similarity {similarity}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
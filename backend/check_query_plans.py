@@ -0,0 +1,122 @@
+"""Fail if a hot query falls back to a full table scan.
+
+Builds a scratch database through the normal startup path (create_all plus
+migrations), runs each hot query the way the routes do while recording the
+SQL it sends, and checks SQLite's EXPLAIN QUERY PLAN for every statement.
+A plan step that scans a whole table, or sorts the rows of a list in a
+temporary B-tree instead of reading them in index order, is reported and the script
+exits with status 1. Run from this directory: ``python check_query_plans.py``
+"""
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from pagination import keyset_page
+from quiz_stats import compute_quiz_stats
+
+# Reading every row of a table, even through an index; SEARCH steps are fine
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)")
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+def seed():
+    db = backend.db
+    for n in range(3):
+        user = backend.User(name=f"plan{n}", email=f"plan{n}@example.com", password="x")
+        db.session.add(user)
+        db.session.flush()
+        for i in range(30):
+            created = datetime.utcnow() - timedelta(hours=i)
+            db.session.add(backend.Quiz(title=f"Quiz {i % 4}", score="3/5", correct=3, total=5,
+                                        created_at=created, user_id=user.id))
+            db.session.add(backend.Problem(title=f"Problem {i}", difficulty="Easy", category="Arrays",
+                                           solution="", examples="[]", created_at=created, user_id=user.id))
+    db.session.commit()
+    sections = [{"title": "Basics", "description": "", "modules": [{"name": "Intro", "completed": False}]}]
+    users = backend.User.query.all()
+    for user in users:
+        for i in range(10):
+            db.session.add(backend.Roadmap.from_sections(
+                sections, name=f"Roadmap {i}", description="", user_id=user.id, email=user.email,
+                created_at=datetime.utcnow() - timedelta(days=i)
+            ))
+    db.session.commit()
+    db.session.execute(backend.db.text("ANALYZE"))
+    return users[1]
+
+
+def hot_queries(user):
+    now = datetime.utcnow()
+    Quiz, Roadmap, Problem = backend.Quiz, backend.Roadmap, backend.Problem
+    return {
+        "quiz list": lambda: keyset_page(Quiz.query.filter_by(user_id=user.id), Quiz, 20),
+        "quiz list, next page": lambda: keyset_page(Quiz.query.filter_by(user_id=user.id), Quiz, 20, (now, 10 ** 9)),
+        "quiz stats": lambda: compute_quiz_stats(backend.db.session, Quiz, user.id, now),
+        "roadmap list": lambda: keyset_page(backend.roadmap_list_query(user.id, None), Roadmap, 20),
+        "roadmap summaries": lambda: keyset_page(
+            backend.roadmap_list_query(user.id, ["id", "name"]), Roadmap, 20, (now, 10 ** 9)
+        ),
+        "user roadmaps": lambda: Roadmap.query.filter_by(user_id=user.id).all(),
+        "roadmap by id": lambda: Roadmap.query.filter_by(id=1, user_id=user.id).first(),
+        "user problems": lambda: Problem.query.filter_by(user_id=user.id).all(),
+        "problem by id": lambda: Problem.query.filter_by(id=1, user_id=user.id).first(),
+        "user by email": lambda: backend.User.query.filter_by(email=user.email).first(),
+    }
+
+
+def capture(engine, fn):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def problems_in(conn, statement, parameters):
+    plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    details = [row[-1] for row in plan]
+    found = []
+    for detail in details:
+        # Sorting aggregated groups is fine, sorting the rows of a list is not
+        if FULL_SCAN.match(detail) or (detail.startswith(TEMP_SORT) and "GROUP BY" not in statement):
+            found.append(detail)
+    return details, found
+
+
+def main():
+    failures = 0
+    with backend.app.app_context():
+        user = seed()
+        engine = backend.db.engine
+        for name, fn in hot_queries(user).items():
+            statements = capture(engine, fn)
+            with engine.connect() as conn:
+                for statement, parameters in statements:
+                    details, found = problems_in(conn, statement, parameters)
+                    status = "FAIL" if found else "ok"
+                    failures += bool(found)
+                    print(f"{status:<4} {name}: {' | '.join(details)}")
+        # Closes the scratch database so its directory can be removed
+        engine.dispose()
+    print(f"{failures} hot statements scan a full table" if failures else "All hot queries use an index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory(prefix="query_plans_") as directory:
+        # app reads DATABASE_URL when it is imported
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(directory, "plans.db")
+        import app as backend
+        status = main()
+    sys.exit(status)
@@ -0,0 +1,404 @@
+"""Cache of module explanations and a background prefetcher that warms it.
+
+Explanations are keyed on the normalized (course, module, subtopic) triple
+and the explanation prompt version. When a roadmap is created its first
+modules can be queued for prefetching; a single daemon thread generates
+them at a limited rate and steps aside while interactive Gemini calls are
+busy, so prefetching never competes with users waiting on a response.
+
+Free-text titles rarely repeat exactly ("Intro to Loops" vs "Introduction
+to loops"), so an exact miss falls back to a fuzzy lookup. Each worker keeps
+MinHash signatures of the cached triples' character trigrams in an LSH
+index. A candidate is reused when the trigram Jaccard similarity of every
+field reaches the threshold and every field carries the same numbers, so
+"Part 1" never stands in for "Part 2" however alike the rest reads.
+"""
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+from cache_store import SqlCache
+
+# Spellings treated as the same word when comparing titles
+WORD_ALIASES = {
+    "intro": "introduction",
+    "basics": "fundamentals",
+    "func": "function",
+    "funcs": "functions",
+    "fn": "function",
+    "var": "variable",
+    "vars": "variables",
+    "algo": "algorithm",
+    "algos": "algorithms",
+    "db": "database",
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "oop": "object oriented",
+}
+
+STOP_WORDS = {"a", "an", "the", "to", "of", "and", "in", "on", "with", "&", "programming", "language"}
+
+_PRIME = (1 << 61) - 1
+
+# Standalone roman numerals up to 39, as in "Sorting Algorithms II"
+_ROMAN = re.compile(r"^x{0,3}(ix|iv|v?i{0,3})$")
+_ROMAN_VALUES = {"i": 1, "v": 5, "x": 10}
+
+
+def explanation_key(course_title, module_title, subtopic, version):
+    parts = (" ".join(str(part or "").lower().split()) for part in (course_title, module_title, subtopic))
+    return f"{version}:" + "|".join(parts)
+
+
+def normalize_title(title):
+    """Lowercase, drop punctuation and stop words, and expand common abbreviations"""
+    words = re.sub(r"[^\w\s+#]", " ", str(title or "").lower()).split()
+    return " ".join(word for word in (WORD_ALIASES.get(word, word) for word in words) if word not in STOP_WORDS)
+
+
+def trigrams(title):
+    padded = f" {normalize_title(title)} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def roman_value(word):
+    total = 0
+    for letter, following in zip(word, word[1:] + " "):
+        value = _ROMAN_VALUES[letter]
+        total += -value if _ROMAN_VALUES.get(following, 0) > value else value
+    return total
+
+
+def title_numbers(title):
+    """Numbers in a title, digits or roman numerals, in order; "Part II" and "part 2" give the same"""
+    numbers = []
+    for word in normalize_title(title).split():
+        if word and _ROMAN.match(word):
+            numbers.append(roman_value(word))
+        else:
+            numbers.extend(int(digits) for digits in re.findall(r"\d+", word))
+    return tuple(numbers)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class MinHashLSH:
+    """Banded MinHash index returning keys whose shingle sets are likely similar.
+
+    With b bands of r rows, two sets of Jaccard similarity s become
+    candidates with probability 1 - (1 - s^r)^b, so the defaults (8 x 4)
+    catch nearly every pair above 0.7 while rarely proposing pairs below 0.4.
+    """
+
+    def __init__(self, bands=8, rows=4, seed=1):
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(bands * rows)]
+        self._buckets = [{} for _ in range(bands)]
+        self._keys = {}
+
+    def signature(self, shingles):
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles] or [0]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._params]
+
+    def _bands(self, signature):
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def add(self, key, shingles, signature=None):
+        """Index key; pass a precomputed signature to keep the hashing out of a caller's lock"""
+        if key in self._keys:
+            return
+        signature = signature or self.signature(shingles)
+        self._keys[key] = signature
+        for band, chunk in self._bands(signature):
+            self._buckets[band].setdefault(chunk, set()).add(key)
+
+    def remove(self, key):
+        signature = self._keys.pop(key, None)
+        if signature is None:
+            return
+        for band, chunk in self._bands(signature):
+            bucket = self._buckets[band].get(chunk)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][chunk]
+
+    def candidates(self, shingles):
+        found = set()
+        for band, chunk in self._bands(self.signature(shingles)):
+            found |= self._buckets[band].get(chunk, set())
+        return found
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class ExplanationCache:
+    """Generated explanations shared by every user and worker.
+
+    ``fuzzy_threshold`` is the trigram Jaccard similarity each of the three
+    fields must reach for a near-duplicate request to reuse an explanation;
+    None disables the fuzzy lookup. The fuzzy index is built from the shared
+    table by a background thread started on the first lookup, and refreshed
+    at most every ``sync_interval`` seconds. Each sync reads at most
+    ``sync_batch`` rows and hashes them outside the index lock, so a
+    request never waits for the whole table to be indexed.
+    """
+
+    def __init__(self, engine, version, ttl=None, max_entries=None,
+                 fuzzy_threshold=0.7, bands=8, rows=4, sync_interval=5, sync_batch=500):
+        self.version = version
+        self.store = SqlCache(engine, "explanation_cache", ttl=ttl, max_entries=max_entries)
+        self.fuzzy_threshold = fuzzy_threshold
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self._lsh = MinHashLSH(bands, rows)
+        self._fields = {}
+        self._numbers = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_until = (0.0, "")
+        self._next_sync = 0.0
+        self._warmer = None
+        self._warmed = False
+        self._fuzzy = {"lookups": 0, "hits": 0}
+
+    def _entry(self, key):
+        """Compute (fields, numbers, signature) for a key of this version, or None; needs no lock"""
+        prefix = f"{self.version}:"
+        if not key.startswith(prefix):
+            return None
+        parts = key[len(prefix):].split("|")
+        if len(parts) != 3:
+            return None
+        fields = tuple(trigrams(part) for part in parts)
+        numbers = tuple(title_numbers(part) for part in parts)
+        return fields, numbers, self._lsh.signature(self._shingles(fields))
+
+    def _add_entry(self, key, entry):
+        # Called with self._lock held
+        if entry is None or key in self._fields:
+            return
+        fields, numbers, signature = entry
+        self._fields[key] = fields
+        self._numbers[key] = numbers
+        self._lsh.add(key, None, signature=signature)
+
+    def _shingles(self, fields):
+        # Tag each trigram with its field so the signature covers all three together
+        return [f"{index}{trigram}" for index, field in enumerate(fields) for trigram in field]
+
+    def _sync(self):
+        """Index up to sync_batch entries written since the last sync, returning True once caught up"""
+        if time.monotonic() < self._next_sync:
+            return True
+        # Whoever holds the sync lock is already indexing; lookups just use the index as it is
+        if not self._sync_lock.acquire(blocking=False):
+            return False
+        try:
+            created_after, key_after = self._synced_until
+            with self.store.engine.connect() as conn:
+                rows = conn.execute(text(
+                    "SELECT cache_key, created_at FROM explanation_cache "
+                    "WHERE created_at > :created OR (created_at = :created AND cache_key > :key) "
+                    "ORDER BY created_at, cache_key LIMIT :limit"
+                ), {"created": created_after, "key": key_after, "limit": self.sync_batch}).all()
+            entries = [(key, self._entry(key)) for key, _ in rows]
+            with self._lock:
+                for key, entry in entries:
+                    self._add_entry(key, entry)
+            if rows:
+                self._synced_until = (rows[-1].created_at, rows[-1].cache_key)
+            caught_up = len(rows) < self.sync_batch
+            if caught_up:
+                self._next_sync = time.monotonic() + self.sync_interval
+            return caught_up
+        finally:
+            self._sync_lock.release()
+
+    def _warm(self):
+        try:
+            while not self._sync():
+                time.sleep(0.001)
+            self._warmed = True
+        except Exception as e:
+            # The next lookup starts another attempt
+            print(f"Building the explanation index failed: {e}")
+
+    def _start_warming(self):
+        """Index the existing entries in the background; True once that is done"""
+        if self._warmed:
+            return True
+        with self._lock:
+            # Started lazily so that forked worker processes each build their own index
+            if self._warmer is None or not self._warmer.is_alive():
+                self._warmer = threading.Thread(target=self._warm, name="explanation-index", daemon=True)
+                self._warmer.start()
+        return False
+
+    def find_similar(self, course_title, module_title, subtopic):
+        """Return (key, similarity) of the closest cached triple above the threshold, or (None, 0)"""
+        fields = (trigrams(course_title), trigrams(module_title), trigrams(subtopic))
+        numbers = (title_numbers(course_title), title_numbers(module_title), title_numbers(subtopic))
+        best_key, best_score = None, 0.0
+        # Until the index is built, near duplicates of entries not indexed yet are missed
+        if self._start_warming():
+            self._sync()
+        with self._lock:
+            for key in self._lsh.candidates(self._shingles(fields)):
+                if self._numbers[key] != numbers:
+                    continue
+                scores = [jaccard(a, b) for a, b in zip(fields, self._fields[key])]
+                if min(scores) >= self.fuzzy_threshold and sum(scores) / 3 > best_score:
+                    best_key, best_score = key, sum(scores) / 3
+        return best_key, round(best_score, 3)
+
+    def lookup(self, course_title, module_title, subtopic):
+        """Return (explanation, similarity): 1.0 for an exact hit, below 1.0 for a near duplicate.
+
+        A near-duplicate hit is also stored under the exact key, so repeating
+        the request is an exact hit.
+        """
+        explanation = self.get(course_title, module_title, subtopic)
+        if explanation is not None or self.fuzzy_threshold is None:
+            return explanation, 1.0 if explanation is not None else 0.0
+
+        key, similarity = self.find_similar(course_title, module_title, subtopic)
+        explanation = self.store.get(key) if key else None
+        if key and explanation is None:
+            # Expired or evicted since it was indexed
+            with self._lock:
+                self._lsh.remove(key)
+                self._fields.pop(key, None)
+                self._numbers.pop(key, None)
+        with self._lock:
+            self._fuzzy["lookups"] += 1
+            self._fuzzy["hits"] += int(explanation is not None)
+        if explanation is None:
+            return None, 0.0
+        self.put(course_title, module_title, subtopic, explanation)
+        return explanation, similarity
+
+    def get(self, course_title, module_title, subtopic):
+        return self.store.get(explanation_key(course_title, module_title, subtopic, self.version))
+
+    def put(self, course_title, module_title, subtopic, explanation):
+        key = explanation_key(course_title, module_title, subtopic, self.version)
+        self.store.put(key, explanation)
+        entry = self._entry(key)
+        with self._lock:
+            self._add_entry(key, entry)
+
+    def contains(self, course_title, module_title, subtopic):
+        """Check for an entry without counting a hit or miss"""
+        return self.store.contains(explanation_key(course_title, module_title, subtopic, self.version))
+
+    def clear(self):
+        self.store.clear()
+        with self._lock:
+            self._lsh = MinHashLSH(self._lsh.bands, self._lsh.rows)
+            self._fields = {}
+            self._numbers = {}
+
+    def stats(self):
+        with self._lock:
+            fuzzy = dict(self._fuzzy)
+            indexed = len(self._lsh)
+        fuzzy.update(
+            threshold=self.fuzzy_threshold,
+            indexed=indexed,
+            hit_rate=round(fuzzy["hits"] / fuzzy["lookups"], 4) if fuzzy["lookups"] else 0.0
+        )
+        return {**self.store.stats(), "fuzzy": fuzzy}
+
+
+class ExplanationPrefetcher:
+    """Generates queued explanations in the background at no more than rate_per_minute.
+
+    ``generate(course_title, module_title, subtopic)`` must return the
+    explanation text or raise. ``busy()`` returning True pauses prefetching
+    until interactive calls have finished.
+    """
+
+    def __init__(self, cache, generate, rate_per_minute=6, max_pending=200, busy=None, idle_poll=1.0):
+        self.cache = cache
+        self.generate = generate
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0
+        self.max_pending = max_pending
+        self.busy = busy or (lambda: False)
+        self.idle_poll = idle_poll
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = OrderedDict()
+        self._thread = None
+        self._next_call = 0.0
+        self._counters = {"queued": 0, "prefetched": 0, "already_cached": 0, "dropped": 0, "failed": 0}
+
+    def enqueue(self, triples):
+        """Queue (course_title, module_title, subtopic) triples, returning how many were added"""
+        added = 0
+        with self._wakeup:
+            for triple in triples:
+                key = explanation_key(*triple, self.cache.version)
+                if key in self._pending:
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self._counters["dropped"] += 1
+                    continue
+                self._pending[key] = triple
+                added += 1
+            self._counters["queued"] += added
+            # Started lazily so that forked worker processes each get their own thread
+            if added and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="explanation-prefetch", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return added
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                _, triple = self._pending.popitem(last=False)
+
+            if self.cache.contains(*triple):
+                self._count("already_cached")
+                continue
+
+            # Low priority: wait for the rate limit and for interactive calls to drain
+            while True:
+                delay = self._next_call - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                elif self.busy():
+                    time.sleep(self.idle_poll)
+                else:
+                    break
+            self._next_call = time.monotonic() + self.interval
+
+            try:
+                self.cache.put(*triple, self.generate(*triple))
+                self._count("prefetched")
+            except Exception as e:
+                self._count("failed")
+                print(f"Prefetching the explanation for {triple} failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "pending": len(self._pending)}
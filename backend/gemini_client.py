@@ -0,0 +1,488 @@
+"""Process-wide Gemini client shared by every endpoint.
+
+Wraps ``genai.GenerativeModel`` with model reuse, a concurrency limit,
+per-call deadlines, jittered exponential backoff on retryable errors and a
+circuit breaker, so routes can fail fast to their fallback content while the
+upstream is unhealthy.
+
+Calls made for a named endpoint get that endpoint's latency budget as their
+deadline. Once enough latencies have been observed, a call still running
+after the endpoint's p95 gets one hedged duplicate and whichever answer
+arrives first is used. An attempt nobody waits for any more (cancelled,
+past its deadline, or the losing side of a hedge) keeps counting as an
+outbound call until the SDK returns. It moves from its concurrency slot to
+a small separate budget of abandoned calls when that has room, so
+abandoned calls cannot starve new requests and the number of real
+outbound calls stays bounded by the two limits together.
+"""
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GeminiUnavailable(Exception):
+    """Raised when Gemini cannot answer; callers should use their fallback"""
+
+
+class CircuitOpen(GeminiUnavailable):
+    """Raised without calling Gemini while the circuit breaker is open"""
+
+
+class DeadlineExceeded(GeminiUnavailable):
+    """Raised when a call did not finish within its deadline"""
+
+
+class CallCancelled(GeminiUnavailable):
+    """Raised when the caller gave up on a call, e.g. because its client disconnected"""
+
+
+def parse_budgets(text):
+    """Parse "roadmap=12,quiz=8" into {"roadmap": 12.0, "quiz": 8.0}"""
+    budgets = {}
+    for item in (text or "").split(","):
+        if "=" in item:
+            endpoint, seconds = item.split("=", 1)
+            budgets[endpoint.strip()] = float(seconds)
+    return budgets
+
+
+def is_retryable(error):
+    """Check whether an upstream error is worth retrying"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    if callable(code):
+        # gRPC errors expose the status as a method
+        return False
+    return code in RETRYABLE_STATUS_CODES
+
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures and lets one probe through after reset_timeout"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        """Return True if a call may go upstream right now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            # Half-open: let a single probe call decide whether to close again
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class LatencyTracker:
+    """Recent successful call latencies per endpoint"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, endpoint, fraction, min_samples=1):
+        """Return the latency below which fraction of recent calls finished, or None without enough data"""
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def stats(self):
+        with self._lock:
+            endpoints = list(self._samples)
+        return {
+            endpoint: {
+                "samples": len(self._samples[endpoint]),
+                "p50": round(self.percentile(endpoint, 0.5), 3),
+                "p95": round(self.percentile(endpoint, 0.95), 3),
+            }
+            for endpoint in endpoints
+        }
+
+
+class _Attempt:
+    """One background call and the slot it holds until the SDK call returns"""
+
+    def __init__(self, client):
+        self.client = client
+        self.abandoned = threading.Event()
+        self._lock = threading.Lock()
+        self._slot = None
+
+    def hold(self):
+        """Record the slot just acquired, or give it back at once if the caller already left"""
+        with self._lock:
+            if self.abandoned.is_set():
+                self.client._release()
+                return False
+            self._slot = "active"
+            return True
+
+    def release(self):
+        """Called by the worker once its call has returned"""
+        with self._lock:
+            if self._slot == "active":
+                self.client._release()
+            elif self._slot == "abandoned":
+                self.client._release_abandoned()
+            self._slot = None
+
+    def abandon(self):
+        """Stop retries and, if the abandoned budget has room, free the active slot for new requests"""
+        with self._lock:
+            self.abandoned.set()
+            if self._slot == "active" and self.client._acquire_abandoned():
+                self.client._release()
+                self._slot = "abandoned"
+
+
+class GeminiClient:
+    """Shared entry point for all Gemini calls made by the backend"""
+
+    def __init__(self, model_name="gemini-2.0-flash", model_factory=None,
+                 max_concurrency=8, timeout=30, max_retries=2,
+                 backoff_base=0.5, backoff_max=8, breaker=None,
+                 budgets=None, hedging=False, hedge_min_samples=20, hedge_min_delay=0.5,
+                 max_abandoned=None):
+        if model_factory is None:
+            import google.generativeai as genai
+            model_factory = genai.GenerativeModel
+        self.model_name = model_name
+        self.model_factory = model_factory
+        self.max_concurrency = max_concurrency
+        self.max_abandoned = max(1, max_concurrency // 4) if max_abandoned is None else max_abandoned
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.budgets = budgets or {}
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.latency = LatencyTracker()
+        self._local = threading.local()
+        self._counters = {"hedged": 0, "hedge_wins": 0, "hedges_skipped": 0, "abandoned": 0,
+                          "deadline_exceeded": 0, "cancelled": 0}
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._models = {}
+        self._models_lock = threading.Lock()
+        self._in_flight = 0
+        self._abandoned_in_flight = 0
+
+    def model(self, model_name=None):
+        """Return the shared model object, creating it on first use"""
+        model_name = model_name or self.model_name
+        with self._models_lock:
+            if model_name not in self._models:
+                self._models[model_name] = self.model_factory(model_name)
+            return self._models[model_name]
+
+    def _backoff(self, attempt):
+        # Full jitter: sleep somewhere between 0 and the exponential cap
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _acquire(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self._semaphore.acquire(timeout=remaining):
+            raise DeadlineExceeded("Timed out waiting for a free Gemini slot")
+        with self._models_lock:
+            self._in_flight += 1
+
+    def _release(self):
+        with self._models_lock:
+            self._in_flight -= 1
+        self._semaphore.release()
+
+    def _acquire_abandoned(self):
+        with self._models_lock:
+            if self._abandoned_in_flight >= self.max_abandoned:
+                return False
+            self._abandoned_in_flight += 1
+            self._counters["abandoned"] += 1
+            return True
+
+    def _release_abandoned(self):
+        with self._models_lock:
+            self._abandoned_in_flight -= 1
+
+    def _call(self, prompt, deadline, stream=False, abandoned=None, **kwargs):
+        """Make one upstream call with retries, returning the raw response.
+
+        Once the abandoned event is set no further retry is made.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpen("Gemini circuit breaker is open")
+
+        attempt = 0
+        while True:
+            if abandoned is not None and abandoned.is_set():
+                raise CallCancelled("Gemini call abandoned by its caller")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.breaker.record_failure()
+                raise DeadlineExceeded("Gemini call exceeded its deadline")
+            try:
+                response = self.model().generate_content(
+                    prompt,
+                    stream=stream,
+                    request_options={"timeout": remaining},
+                    **kwargs
+                )
+                self.breaker.record_success()
+                return response
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered, so this says nothing about its health
+                    self.breaker.record_success()
+                    raise
+                delay = self._backoff(attempt)
+                attempt += 1
+                if attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise GeminiUnavailable(f"Gemini call failed: {e}") from e
+                print(f"Retrying Gemini call in {delay:.2f}s after error: {e}")
+                if abandoned is not None:
+                    abandoned.wait(delay)
+                else:
+                    time.sleep(delay)
+
+    @property
+    def in_flight(self):
+        with self._models_lock:
+            return self._in_flight
+
+    def budget(self, endpoint=None):
+        """Seconds a call for endpoint may take in total"""
+        return self.budgets.get(endpoint) or self.timeout
+
+    def _count(self, name):
+        with self._models_lock:
+            self._counters[name] += 1
+
+    def _can_hedge(self):
+        """Hedge only while a quarter of the slots (at least one) would still be free afterwards"""
+        free = self.max_concurrency - self.in_flight
+        return free - 1 >= max(1, self.max_concurrency // 4)
+
+    @contextmanager
+    def cancel_when(self, cancelled):
+        """Abandon calls made by this thread inside the block once cancelled() returns True"""
+        previous = getattr(self._local, "cancelled", None)
+        self._local.cancelled = cancelled
+        try:
+            yield
+        finally:
+            self._local.cancelled = previous
+
+    def _generate_once(self, prompt, deadline, attempt, **kwargs):
+        self._acquire(deadline)
+        if not attempt.hold():
+            raise CallCancelled("Gemini call abandoned by its caller")
+        try:
+            return self._call(prompt, deadline, abandoned=attempt.abandoned, **kwargs).text
+        finally:
+            attempt.release()
+
+    def generate(self, prompt, timeout=None, endpoint=None, **kwargs):
+        """Generate a completion and return its text.
+
+        The deadline is timeout seconds if given, else the endpoint's budget.
+        Raises DeadlineExceeded once it passes and CallCancelled when the
+        cancel_when check fires, so callers can use their fallback.
+        """
+        started = time.monotonic()
+        deadline = started + (timeout or self.budget(endpoint))
+        cancelled = getattr(self._local, "cancelled", None)
+        hedge_delay = None
+        if self.hedging and endpoint:
+            p95 = self.latency.percentile(endpoint, 0.95, self.hedge_min_samples)
+            if p95 is not None:
+                hedge_delay = max(p95, self.hedge_min_delay)
+
+        try:
+            text = self._generate_raced(prompt, deadline, hedge_delay, cancelled, kwargs)
+        except DeadlineExceeded:
+            self._count("deadline_exceeded")
+            raise
+        except CallCancelled:
+            self._count("cancelled")
+            raise
+        if endpoint:
+            self.latency.record(endpoint, time.monotonic() - started)
+        return text
+
+    def _generate_raced(self, prompt, deadline, hedge_delay, cancelled, kwargs):
+        """Run the call in the background, hedging it after hedge_delay and polling cancelled.
+
+        Waiting here instead of inside the SDK means the deadline holds even
+        if the transport ignores its timeout. An abandoned attempt is not
+        interrupted. It makes no further retries, holds a slot until the SDK
+        returns, and its result is dropped.
+        """
+        results = queue.Queue()
+        attempts = []
+
+        def launch(index, name):
+            attempts.append(_Attempt(self))
+            threading.Thread(target=run, args=(index, attempts[-1]), name=name, daemon=True).start()
+
+        def run(index, attempt):
+            try:
+                results.put((index, True, self._generate_once(prompt, deadline, attempt, **kwargs)))
+            except Exception as e:
+                results.put((index, False, e))
+
+        launch(0, "gemini-call")
+        failed = 0
+        hedge_at = time.monotonic() + hedge_delay if hedge_delay is not None else None
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    raise DeadlineExceeded("Gemini call exceeded its deadline")
+                if cancelled is not None and cancelled():
+                    raise CallCancelled("Gemini call cancelled by the caller")
+                if hedge_at is not None and len(attempts) == 1 and now >= hedge_at:
+                    if self._can_hedge():
+                        self._count("hedged")
+                        launch(1, "gemini-hedge")
+                    else:
+                        # Too few free slots; a hedge would only push new requests into DeadlineExceeded
+                        self._count("hedges_skipped")
+                        hedge_at = None
+                wait = deadline - now
+                if hedge_at is not None and len(attempts) == 1:
+                    wait = min(wait, max(hedge_at - now, 0))
+                if cancelled is not None:
+                    wait = min(wait, 0.1)
+                try:
+                    index, ok, value = results.get(timeout=max(wait, 0.001))
+                except queue.Empty:
+                    continue
+                if ok:
+                    if index == 1:
+                        self._count("hedge_wins")
+                    return value
+                failed += 1
+                # A hedge is only worth waiting for while the other attempt is still running
+                if failed == len(attempts):
+                    raise value
+        finally:
+            # Whatever is still running is abandoned: the caller has its answer or has left
+            for attempt in attempts:
+                attempt.abandon()
+
+    def stream(self, prompt, timeout=None, endpoint=None, **kwargs):
+        """Yield completion text chunks as they arrive.
+
+        The concurrency slot is held until the stream is exhausted or closed.
+        The deadline (timeout, else the endpoint's budget) covers the call
+        until the first chunk.
+        """
+        deadline = time.monotonic() + (timeout or self.budget(endpoint))
+        self._acquire(deadline)
+        try:
+            response = self._call(prompt, deadline, stream=True, **kwargs)
+            for chunk in response:
+                # Chunks without candidate text (e.g. the final safety summary) raise on .text
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue
+                if text:
+                    yield text
+        finally:
+            self._release()
+
+    def stats(self):
+        with self._models_lock:
+            in_flight = self._in_flight
+            abandoned_in_flight = self._abandoned_in_flight
+            counters = dict(self._counters)
+        return {
+            "model": self.model_name,
+            "circuit": self.breaker.state,
+            "in_flight": in_flight,
+            "max_concurrency": self.max_concurrency,
+            "abandoned_in_flight": abandoned_in_flight,
+            "max_abandoned": self.max_abandoned,
+            "hedging": self.hedging,
+            "budgets": self.budgets,
+            "latency": self.latency.stats(),
+            **counters,
+        }
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Local stand-in for ``genai.GenerativeModel`` used in development and tests.
+
+    ``responder`` maps a prompt to reply text (or raises to simulate an
+    upstream error); ``latency`` adds a fixed delay to every call.
+    """
+
+    def __init__(self, model_name="fake", responder=None, latency=0):
+        self.model_name = model_name
+        self.responder = responder or (lambda prompt: "Placeholder response from the local fake Gemini model.")
+        self.latency = latency
+        self.calls = []
+
+    def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+        self.calls.append(prompt)
+        if self.latency:
+            timeout = (request_options or {}).get("timeout")
+            if timeout is not None and timeout < self.latency:
+                time.sleep(timeout)
+                raise TimeoutError("Fake model timed out")
+            time.sleep(self.latency)
+        text = self.responder(prompt)
+        if stream:
+            # Split into a few chunks the way the streaming API would
+            size = max(1, len(text) // 4)
+            return iter([FakeResponse(text[i:i + size]) for i in range(0, len(text), size)])
+        return FakeResponse(text)
@@ -0,0 +1,33 @@
+"""Gunicorn settings for the backend; run with ``gunicorn -c gunicorn.conf.py wsgi:app``"""
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Threads keep a worker responsive while its requests wait on Gemini or stream SSE
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+# Import the app once in the master so workers fork with the code and startup migrations done
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # SQLite connections must not be shared across processes, so drop the ones the
+    # master opened during startup; each worker opens its own on first use
+    from app import app, db
+
+    with app.app_context():
+        db.engine.dispose()
+
+
+def worker_exit(server, worker):
+    # Commit progress and quiz writes still waiting in this worker's write-behind queue
+    from app import write_behind
+
+    if write_behind is not None:
+        write_behind.close()
@@ -0,0 +1,159 @@
+"""Background job pipeline for the slow Gemini-backed endpoints"""
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+class QueueFull(Exception):
+    """Raised when the bounded job queue cannot accept more work"""
+
+
+class JobQueue:
+    """Runs generation work on a bounded worker pool and records job status.
+
+    Job rows live in the ``generation_job`` table so any worker process can
+    answer ``/jobs/<id>`` polls, while completion inside this process is also
+    signalled through a condition variable so SSE listeners wake up at once.
+    """
+
+    def __init__(self, app, engine, max_workers=4, max_pending=100,
+                 retention=3600, poll_interval=0.5):
+        self.app = app
+        self.engine = engine
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._lock = threading.Lock()
+        self._finished = threading.Condition()
+        self._pending = 0
+        self._ensure_table()
+
+    def _ensure_table(self):
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS generation_job ("
+                "id TEXT PRIMARY KEY, "
+                "kind TEXT NOT NULL, "
+                "status TEXT NOT NULL, "
+                "status_code INTEGER, "
+                "result TEXT, "
+                "error TEXT, "
+                "created_at REAL NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_generation_job_updated_at "
+                "ON generation_job (updated_at)"
+            ))
+
+    def _get_executor(self):
+        # Started lazily so that forked worker processes each get their own threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="generation-job"
+                )
+            return self._executor
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return the new job id.
+
+        fn runs inside an application context and must return a
+        ``(payload, status_code)`` tuple with a JSON-serializable payload.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM generation_job WHERE updated_at < :cutoff"
+            ), {"cutoff": now - self.retention})
+            conn.execute(text(
+                "INSERT INTO generation_job (id, kind, status, created_at, updated_at) "
+                "VALUES (:id, :kind, 'queued', :now, :now)"
+            ), {"id": job_id, "kind": kind, "now": now})
+
+        try:
+            self._get_executor().submit(self._run, job_id, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        try:
+            self._update(job_id, status="running")
+            with self.app.app_context():
+                payload, status_code = fn(*args, **kwargs)
+            self._update(job_id, status="succeeded", status_code=status_code,
+                         result=json.dumps(payload))
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self._update(job_id, status="failed", status_code=500, error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+            with self._finished:
+                self._finished.notify_all()
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = :{name}" for name in fields)
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"UPDATE generation_job SET {assignments} WHERE id = :id"
+            ), {"id": job_id, **fields})
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if it is unknown or expired"""
+        with self.engine.connect() as conn:
+            row = conn.execute(text(
+                "SELECT id, kind, status, status_code, result, error, created_at, updated_at "
+                "FROM generation_job WHERE id = :id"
+            ), {"id": job_id}).mappings().first()
+        if row is None:
+            return None
+
+        job = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        if row["status"] in FINISHED_STATUSES:
+            job["status_code"] = row["status_code"]
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+            job["error"] = row["error"]
+        return job
+
+    def wait(self, job_id, timeout):
+        """Block until the job finishes or timeout elapses, then return it"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED_STATUSES or remaining <= 0:
+                return job
+            # Jobs finishing in this process wake us early; others are polled
+            with self._finished:
+                self._finished.wait(min(self.poll_interval, remaining))
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "max_pending": self.max_pending,
+                    "max_workers": self.max_workers}
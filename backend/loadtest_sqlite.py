@@ -0,0 +1,106 @@
+"""Compare SQLite write throughput with the default settings and with the tuned pragmas.
+
+Several processes, each with several threads, insert and commit rows into a
+scratch database the way gunicorn workers write progress updates. Run with
+``python loadtest_sqlite.py --processes 4 --threads 4 --seconds 10``.
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from sqlite_pragmas import DEFAULT_PRAGMAS, apply_pragmas
+
+# What the app ran with before: SQLite's rollback journal and full fsyncs, plus
+# the 5 second lock wait Python's sqlite3 module sets by default
+STOCK_PRAGMAS = {"journal_mode": "DELETE", "busy_timeout": 5000, "synchronous": "FULL"}
+
+
+def connect(path, pragmas):
+    conn = sqlite3.connect(path, timeout=0, check_same_thread=False)
+    apply_pragmas(conn, pragmas)
+    return conn
+
+
+def writer(path, pragmas, deadline, results):
+    writes = locked = 0
+    try:
+        conn = connect(path, pragmas)
+    except sqlite3.OperationalError:
+        results.put((0, 1))
+        return
+    while time.monotonic() < deadline:
+        try:
+            conn.execute(
+                "INSERT INTO progress (email, module, completed) VALUES (?, ?, ?)",
+                (f"user{writes % 50}@example.com", writes, 1)
+            )
+            conn.commit()
+            writes += 1
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            conn.rollback()
+            locked += 1
+    conn.close()
+    results.put((writes, locked))
+
+
+def process_main(path, pragmas, threads, deadline, results):
+    workers = [
+        threading.Thread(target=writer, args=(path, pragmas, deadline, results))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def run(label, pragmas, processes, threads, seconds):
+    directory = tempfile.mkdtemp(prefix="loadtest_sqlite_")
+    path = os.path.join(directory, "load.db")
+    conn = connect(path, pragmas)
+    conn.execute("CREATE TABLE progress (id INTEGER PRIMARY KEY, email TEXT, module INTEGER, completed INTEGER)")
+    conn.commit()
+    conn.close()
+
+    results = multiprocessing.Queue()
+    deadline = time.monotonic() + seconds
+    procs = [
+        multiprocessing.Process(target=process_main, args=(path, pragmas, threads, deadline, results))
+        for _ in range(processes)
+    ]
+    started = time.monotonic()
+    for proc in procs:
+        proc.start()
+    totals = [results.get() for _ in range(processes * threads)]
+    for proc in procs:
+        proc.join()
+    elapsed = time.monotonic() - started
+
+    writes = sum(w for w, _ in totals)
+    locked = sum(l for _, l in totals)
+    print(f"{label:<8} {writes:>8} writes  {writes / elapsed:>9.1f} writes/s  {locked:>8} 'database is locked' errors")
+    return writes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes x {args.threads} threads, {args.seconds:g}s per run")
+    stock = run("default", STOCK_PRAGMAS, args.processes, args.threads, args.seconds)
+    tuned = run("tuned", DEFAULT_PRAGMAS, args.processes, args.threads, args.seconds)
+    if stock:
+        print(f"tuned/default throughput: {tuned / stock:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Versioned schema migrations applied at startup.
+
+``db.create_all()`` only creates missing tables, so every change to an
+existing table (a new column, a new index) is a numbered migration here.
+The applied version is kept in ``schema_version``; each migration runs in
+one transaction together with its version bump, so a failed migration
+leaves the database at the previous version and is retried on the next
+start. Migrations run after ``create_all()``, so each one must also be a
+no-op on a fresh database that already has the current models.
+"""
+from sqlalchemy import inspect, text
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register fn(conn) as the step that brings the schema to version"""
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda step: step[0])
+        return fn
+    return register
+
+
+def add_column(conn, table, name, ddl):
+    if name not in {column["name"] for column in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def create_index(conn, name, table, columns):
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+
+def current_version(engine):
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("schema_version"):
+            return 0
+        return conn.execute(text("SELECT version FROM schema_version")).scalar() or 0
+
+
+def migrate(engine):
+    """Apply pending migrations in order and return the versions that were applied"""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+        conn.execute(text("INSERT INTO schema_version (version) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM schema_version)"))
+
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        with engine.begin() as conn:
+            # The write takes SQLite's lock first, so a second process starting
+            # at the same time waits here and then sees the new version
+            conn.execute(text("UPDATE schema_version SET version = version"))
+            if conn.execute(text("SELECT version FROM schema_version")).scalar() >= version:
+                continue
+            fn(conn)
+            conn.execute(text("UPDATE schema_version SET version = :version"), {"version": version})
+        applied.append(version)
+        print(f"Applied migration {version}: {description}")
+
+    latest = MIGRATIONS[-1][0] if MIGRATIONS else 0
+    found = current_version(engine)
+    if found > latest:
+        print(f"Database schema version {found} is newer than this code ({latest})")
+    return applied
+
+
+@migration(1, "numeric quiz score columns and quiz list indexes")
+def quiz_scores(conn):
+    add_column(conn, "quiz", "correct", "INTEGER")
+    add_column(conn, "quiz", "total", "INTEGER")
+    create_index(conn, "ix_quiz_user_title", "quiz", ["user_id", "title"])
+    create_index(conn, "ix_quiz_user_created", "quiz", ["user_id", "created_at"])
+
+
+@migration(2, "roadmap templates and completion bitmaps")
+def roadmap_templates(conn):
+    add_column(conn, "roadmap", "template_id", "INTEGER REFERENCES roadmap_template (id)")
+    add_column(conn, "roadmap", "completion_bits", "TEXT NOT NULL DEFAULT '0'")
+
+
+@migration(3, "(user_id, created_at) indexes for the roadmap and problem lists")
+def user_created_indexes(conn):
+    create_index(conn, "ix_roadmap_user_created", "roadmap", ["user_id", "created_at"])
+    create_index(conn, "ix_problem_user_created", "problem", ["user_id", "created_at"])
+
+
+@migration(4, "roadmap version column for compare-and-swap updates")
+def roadmap_version(conn):
+    add_column(conn, "roadmap", "version", "INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,359 @@
+"""Versioned prompt templates with token budgeting.
+
+Every Gemini prompt is rendered here from a named template. Fields listed in
+a template's ``limits`` are trimmed to their token ceiling before rendering,
+and if the whole prompt is still over the registry's budget those ceilings
+are halved until it fits. Token counts are estimated locally (about four
+characters per token for English text and code), so rendering never costs
+an extra API call. Bump a template's version whenever its text changes.
+"""
+import textwrap
+import threading
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Approximate Gemini token count for text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_middle(text, max_tokens):
+    """Shorten text to about max_tokens, keeping its beginning and end.
+
+    The omitted part is replaced with a marker naming how many lines were
+    dropped, so the model knows the text is incomplete.
+    """
+    text = str(text)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    keep = max_tokens * CHARS_PER_TOKEN
+    head, tail = text[:keep * 2 // 3], text[len(text) - keep // 3:]
+    omitted = text[len(head):len(text) - len(tail)]
+    return f"{head}\n[... {omitted.count(chr(10)) + 1} lines ({len(omitted)} characters) omitted ...]\n{tail}"
+
+
+def format_examples(examples, max_tokens):
+    """Render examples within max_tokens.
+
+    All examples are written out in full when they fit. Otherwise the
+    explanations are dropped and long inputs/outputs shortened, and if that
+    is still too long the remaining examples are left out with a note.
+    """
+    full = "\n".join(
+        f"Example {ex.get('id')}:\nInput: {ex.get('input')}\nExpected Output: {ex.get('output')}\n"
+        f"Explanation: {ex.get('explanation', '')}"
+        for ex in examples
+    )
+    if estimate_tokens(full) <= max_tokens:
+        return full
+
+    value_tokens = max(16, max_tokens // (2 * max(len(examples), 1)))
+    lines = []
+    used = 0
+    for index, ex in enumerate(examples):
+        line = (f"Example {ex.get('id')}: Input: {truncate_middle(ex.get('input'), value_tokens)} "
+                f"-> Expected Output: {truncate_middle(ex.get('output'), value_tokens)}")
+        if lines and used + estimate_tokens(line) > max_tokens:
+            lines.append(f"({len(examples) - index} more examples omitted)")
+            break
+        lines.append(line)
+        used += estimate_tokens(line)
+    return "\n".join(lines)
+
+
+def edge_cases_for(category):
+    """Typical edge cases to mention for a problem category"""
+    category = (category or "").lower()
+    if "array" in category or "list" in category:
+        return ["Empty array", "Single element array", "Very large array"]
+    if "string" in category:
+        return ["Empty string", "Single character string", "String with special characters"]
+    if "number" in category or "math" in category:
+        return ["Zero", "Negative numbers", "Very large numbers", "Decimal numbers"]
+    return []
+
+
+class PromptTemplate:
+    """A named, versioned ``str.format`` template.
+
+    ``limits`` maps field names to token ceilings; list fields are rendered
+    with format_examples, everything else with truncate_middle.
+    """
+
+    def __init__(self, name, version, text, limits=None):
+        self.name = name
+        self.version = version
+        self.text = textwrap.dedent(text).strip()
+        self.limits = limits or {}
+
+
+class PromptRegistry:
+    """Renders registered templates within a token budget and keeps per-template statistics.
+
+    ``field_limits`` overrides the token ceiling of a field in every template
+    that limits it, e.g. ``{"solution": 1000}``.
+    """
+
+    def __init__(self, budget=6000, field_limits=None, templates=None):
+        self.budget = budget
+        self.field_limits = field_limits or {}
+        self._templates = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+        for template in TEMPLATES if templates is None else templates:
+            self.register(template)
+
+    def register(self, template):
+        self._templates[template.name] = template
+        return template
+
+    def version(self, name):
+        return self._templates[name].version
+
+    def _fill(self, template, fields, scale):
+        values = dict(fields)
+        for field, ceiling in template.limits.items():
+            if field not in values:
+                continue
+            limit = max(32, int(self.field_limits.get(field, ceiling) * scale))
+            value = values[field]
+            values[field] = format_examples(value, limit) if isinstance(value, list) else truncate_middle(value, limit)
+        return template.text.format(**values)
+
+    def render(self, name, **fields):
+        """Render a template, trimming its limited fields until the prompt fits the budget"""
+        template = self._templates[name]
+        untrimmed = estimate_tokens(template.text.format(**{
+            field: format_examples(value, float("inf")) if isinstance(value, list) else value
+            for field, value in fields.items()
+        }))
+        scale = 1.0
+        text = self._fill(template, fields, scale)
+        tokens = estimate_tokens(text)
+        while tokens > self.budget and scale > 0.05 and template.limits:
+            scale /= 2
+            text = self._fill(template, fields, scale)
+            tokens = estimate_tokens(text)
+
+        trimmed = tokens < untrimmed
+        self._record(template, tokens, untrimmed, trimmed)
+        if trimmed:
+            print(f"Prompt {name} v{template.version}: trimmed from ~{untrimmed} to ~{tokens} input tokens")
+        return text
+
+    def _record(self, template, tokens, untrimmed, trimmed):
+        with self._lock:
+            stats = self._stats.setdefault(template.name, {
+                "version": template.version, "renders": 0, "input_tokens": 0,
+                "max_tokens": 0, "trimmed": 0, "tokens_saved": 0
+            })
+            stats["renders"] += 1
+            stats["input_tokens"] += tokens
+            stats["max_tokens"] = max(stats["max_tokens"], tokens)
+            stats["trimmed"] += int(trimmed)
+            stats["tokens_saved"] += untrimmed - tokens
+            renders, total = stats["renders"], stats["input_tokens"]
+        if renders % 100 == 0:
+            print(f"Prompt {template.name}: {renders} renders, ~{total} input tokens in total")
+
+    def stats(self):
+        with self._lock:
+            stats = {name: dict(counters) for name, counters in self._stats.items()}
+        for counters in stats.values():
+            counters["avg_tokens"] = round(counters["input_tokens"] / counters["renders"], 1)
+        return stats
+
+
+TEMPLATES = [
+    PromptTemplate("roadmap", 1, """
+        Create a detailed learning roadmap for {language} programming language.
+        Structure the response as a JSON object with the following format:
+
+        {{
+          "name": "{language} Fundamentals",
+          "icon": "💻",
+          "color": "#4285F4", // Use an appropriate color for {language}
+          "description": "A brief description of {language} and this roadmap.",
+          "roadmap": [
+            {{
+              "title": "Section title",
+              "description": "Section description",
+              "modules": [
+                {{"name": "Module name", "completed": false, "description": "Brief description of what will be learned"}},
+                // More modules...
+              ]
+            }},
+            // More sections...
+          ]
+        }}
+
+        Include at least 3 sections (beginner, intermediate, advanced) with 4 modules each.
+        Make sure to provide appropriate, accurate information for learning {language}.
+        Each module should have a clear, concise description.
+        Set all modules as 'completed: false' by default.
+        Return ONLY the JSON object without any additional text.
+    """, limits={"language": 32}),
+
+    PromptTemplate("roadmap-outline", 1, """
+        Outline a learning roadmap for the {language} programming language.
+        Return a JSON object with:
+        - name: string (e.g. "{language} Fundamentals")
+        - icon: string (a single emoji)
+        - color: string (a hex color appropriate for {language})
+        - description: string (a brief description of {language} and this roadmap)
+        - sections: array of 3-5 objects, ordered from beginner to advanced, each with:
+          - title: string (section title)
+          - description: string (one sentence on what the section covers)
+
+        Return ONLY the JSON object, without the modules of each section.
+    """, limits={"language": 32}),
+
+    PromptTemplate("roadmap-section", 1, """
+        You are writing section {position} of {total} of the learning roadmap "{roadmap_name}" for {language}.
+
+        Section title: {title}
+        Section description: {description}
+        The other sections are: {other_sections}. Do not repeat their topics.
+
+        Return a JSON object with a "modules" array of 4 modules for this section, in learning order. Each module has:
+        - name: string (module name)
+        - completed: boolean (always false)
+        - description: string (brief description of what will be learned)
+    """, limits={"language": 32, "roadmap_name": 32, "title": 32, "description": 128, "other_sections": 256}),
+
+    PromptTemplate("roadmap-section-rewrite", 1, """
+        Rewrite one section of the learning roadmap "{roadmap_name}".
+
+        Section title: {title}
+        Section description: {description}
+        Current modules:
+        {current_modules}
+
+        Learner feedback: {feedback}
+
+        Return a JSON object with a "modules" array of 3-6 modules for this section, in learning order.
+        Keep the name of any current module that should stay, exactly as written. Each module has:
+        - name: string (module name)
+        - completed: boolean (always false)
+        - description: string (brief description of what will be learned)
+    """, limits={"roadmap_name": 32, "title": 32, "description": 128, "current_modules": 400, "feedback": 200}),
+
+    PromptTemplate("problems", 1, """
+        You are an expert computer science educator. Generate 4 programming problems based on the following topics from a user's learning roadmap: {topics}.
+
+        For each problem, create:
+        1. A clear title that describes the problem
+        2. A difficulty level (Easy, Medium, or Hard)
+        3. A specific category (e.g., Algorithms, Data Structures, Mathematics, etc.)
+        4. A detailed solution approach
+        5. 2-3 examples with input, output, and explanation
+
+        Format the response as a JSON array where each object has the following fields:
+        - id: number (1, 2, 3, 4)
+        - title: string (descriptive problem name)
+        - difficulty: string (Easy, Medium, or Hard)
+        - solved: boolean (always false)
+        - category: string (problem category)
+        - solution: string (detailed solution approach)
+        - examplesList: array of example objects with:
+          - id: number (sequential)
+          - input: string (sample input)
+          - output: string (expected output)
+          - explanation: string (explanation of how the output was derived)
+
+        IMPORTANT: Ensure all examples are clear, correct, and properly formatted. The solution should be understandable but challenging appropriate to the difficulty level.
+    """, limits={"topics": 400}),
+
+    PromptTemplate("quiz", 1, """
+        Create a programming quiz with exactly 5 questions on {subject}.
+
+        Return a JSON object with a "questions" array. Each question has:
+        - question: string (the question text)
+        - options: array of exactly 4 distinct answer strings
+        - correctAnswer: number (index of the correct option, 0-3)
+
+        Each question must:
+        - Be clear and specific to programming concepts
+        - Have exactly one correct option
+        - Cover different programming concepts (not all the same language)
+    """, limits={"subject": 64}),
+
+    PromptTemplate("explanation", 1, """
+        Generate a comprehensive educational explanation about {subtopic} in the context of {course_title},
+        specifically within the {module_title} module.
+
+        Include key concepts, definitions, and important aspects that learners should understand.
+
+        The explanation should be structured with an introduction, main points, and a conclusion.
+        Make it between 300-500 words, educational, and accessible to learners.
+    """, limits={"course_title": 64, "module_title": 64, "subtopic": 128}),
+
+    PromptTemplate("validate-solution", 1, """
+        You are a strict programming instructor evaluating a student's solution to a coding problem.
+        You must be critical and thorough in your evaluation.
+
+        Carefully review the following:
+
+        Problem Title: {title}
+        Difficulty: {difficulty}
+        Category: {category}
+
+        Problem Description:
+        {description}
+
+        Examples:
+        {examples}
+
+        User's Solution:
+        {solution}
+
+        IMPORTANT: Be extremely critical and assume the solution is INCORRECT unless you can PROVE it is correct.
+        The default verdict should be INCORRECT.
+
+        Evaluate the user's solution with the following strict criteria:
+        1. Is the solution syntactically correct for the implied programming language?
+        2. Does it correctly implement the exact algorithm or approach described in the problem?
+        3. Does it handle ALL test cases correctly? Trace through each example step by step.
+        4. Would it handle edge cases such as: {edge_cases}?
+        5. Is it efficient and optimized as required by the problem difficulty?
+        6. Does it have any logical errors or bugs?
+
+        For each example, trace through the execution of the user's solution with the given input and verify it produces the exact expected output.
+
+        Only mark as CORRECT if ALL of the following are true:
+        - The solution has NO syntax errors
+        - The solution handles ALL test cases and produces EXACTLY the expected output
+        - The solution uses the CORRECT approach as specified in the problem
+        - The solution would handle all reasonable edge cases
+        - The solution has appropriate time and space complexity for the problem difficulty
+
+        Respond with:
+        1. VERDICT: "CORRECT" only if you have rigorously verified all criteria above are met. Otherwise, "INCORRECT".
+        2. ANALYSIS: Step-by-step analysis of how the solution performs on each test case.
+        3. FEEDBACK: Detailed explanation supporting your verdict.
+        4. SUGGESTIONS: If incorrect, provide hints on how to improve without giving the full solution.
+
+        Remember, you must be STRICT and CRITICAL in your evaluation. When in doubt, mark as INCORRECT.
+    """, limits={"description": 800, "examples": 800, "solution": 2000}),
+
+    PromptTemplate("review-solution", 1, """
+        You are a programming instructor reviewing a student's solution to a coding problem.
+        The solution has already passed all {passed} example test cases when executed, so do not re-check them.
+
+        Problem Title: {title}
+        Difficulty: {difficulty}
+        Category: {category}
+
+        Problem Description:
+        {description}
+
+        User's Solution:
+        {solution}
+
+        Respond with:
+        1. ANALYSIS: Time and space complexity, and any edge cases the solution might still miss.
+        2. FEEDBACK: What the solution does well and how readable it is.
+        3. SUGGESTIONS: Concrete improvements, if any.
+    """, limits={"description": 800, "solution": 2000}),
+]
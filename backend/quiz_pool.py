@@ -0,0 +1,232 @@
+"""Pool of pre-generated quizzes so /generate-quiz only has to read the database.
+
+Quizzes are kept per (topic, difficulty) in the ``quiz_pool`` table, where
+the empty string means "any". Only the topics in ``topics`` get a pool; a
+request for any other topic is left to the caller to generate directly, so
+free-text topics cannot add pools or refill work. A background thread tops a pool back up to
+``target_size`` once a pop leaves it below ``low_water``. Every question that
+enters a pool is recorded by the hash of its normalized text in
+``quiz_question_hash``, so repeated Gemini output is never served twice.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+QUESTIONS_PER_QUIZ = 5
+OPTIONS_PER_QUESTION = 4
+
+
+def is_valid_question(question):
+    """Check that a question has text, 4 distinct options and a correct index"""
+    options = question.get("options") or []
+    return (
+        bool(question.get("question"))
+        and len(options) == OPTIONS_PER_QUESTION
+        and all(options)
+        and len({option.lower() for option in options}) == len(options)
+        and isinstance(question.get("correctAnswer"), int)
+        and 0 <= question["correctAnswer"] < len(options)
+    )
+
+
+def normalize_question(question_text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", question_text.lower()).split())
+
+
+def question_hash(question):
+    return hashlib.sha256(normalize_question(question["question"]).encode("utf-8")).hexdigest()
+
+
+def normalize_key(topic=None, difficulty=None):
+    return (topic or "").strip().lower(), (difficulty or "").strip().lower()
+
+
+class QuizPool:
+    """Stores ready-to-serve quizzes and refills them in the background.
+
+    ``generate(topic, difficulty)`` must return a list of question dicts
+    ({"question", "options", "correctAnswer"}), or raise when no quiz can be
+    generated right now. ``topics`` lists the topics that are pooled; quizzes
+    without a topic always are.
+    """
+
+    def __init__(self, engine, generate, topics=(), target_size=20, low_water=5,
+                 max_rounds=5, hash_retention=30 * 24 * 3600):
+        self.engine = engine
+        self.generate = generate
+        self.topics = frozenset(normalize_key(topic)[0] for topic in topics) | {""}
+        self.target_size = target_size
+        self.low_water = low_water
+        self.max_rounds = max_rounds
+        self.hash_retention = hash_retention
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._wanted = OrderedDict()
+        self._buffers = {}
+        self._thread = None
+        self._counters = {"hits": 0, "misses": 0, "unpooled": 0, "generated": 0, "duplicates": 0, "invalid": 0}
+        self._ensure_tables()
+
+    def _ensure_tables(self):
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS quiz_pool ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "topic TEXT NOT NULL, "
+                "difficulty TEXT NOT NULL, "
+                "questions TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_quiz_pool_key "
+                "ON quiz_pool (topic, difficulty, id)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS quiz_question_hash ("
+                "hash TEXT PRIMARY KEY, "
+                "created_at REAL NOT NULL)"
+            ))
+
+    def _count(self, field):
+        with self._lock:
+            self._counters[field] += 1
+
+    def is_pooled(self, topic=None):
+        return normalize_key(topic)[0] in self.topics
+
+    def size(self, topic=None, difficulty=None):
+        topic, difficulty = normalize_key(topic, difficulty)
+        with self.engine.connect() as conn:
+            return conn.execute(text(
+                "SELECT COUNT(*) FROM quiz_pool WHERE topic = :topic AND difficulty = :difficulty"
+            ), {"topic": topic, "difficulty": difficulty}).scalar()
+
+    def pop(self, topic=None, difficulty=None):
+        """Remove and return the oldest quiz's questions, or None if the pool is empty or the topic is not pooled"""
+        key = normalize_key(topic, difficulty)
+        if key[0] not in self.topics:
+            self._count("unpooled")
+            return None
+        params = {"topic": key[0], "difficulty": key[1]}
+        questions = None
+        for _ in range(3):
+            with self.engine.begin() as conn:
+                row = conn.execute(text(
+                    "SELECT id, questions FROM quiz_pool "
+                    "WHERE topic = :topic AND difficulty = :difficulty ORDER BY id LIMIT 1"
+                ), params).first()
+                if row is None:
+                    break
+                # Another worker may have taken the same row between the two statements
+                deleted = conn.execute(text("DELETE FROM quiz_pool WHERE id = :id"), {"id": row[0]}).rowcount
+            if deleted:
+                questions = json.loads(row[1])
+                break
+
+        self._count("hits" if questions else "misses")
+        if questions is None or self.size(*key) < self.low_water:
+            self.request_refill(*key)
+        return questions
+
+    def request_refill(self, topic=None, difficulty=None):
+        """Ask the background filler to top up a pool; raises ValueError for a topic that is not pooled"""
+        key = normalize_key(topic, difficulty)
+        if key[0] not in self.topics:
+            raise ValueError(f"Topic is not pooled: {key[0]}")
+        with self._wakeup:
+            self._wanted[key] = True
+            # Started lazily so that forked worker processes each get their own thread
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="quiz-pool-filler", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._wanted:
+                    self._wakeup.wait()
+                key, _ = self._wanted.popitem(last=False)
+            try:
+                added = self.fill(*key)
+                print(f"Quiz pool {key} refilled with {added} quizzes")
+            except Exception as e:
+                # The next pop below the low-water mark asks again
+                print(f"Quiz pool refill for {key} failed: {e}")
+
+    def fill(self, topic=None, difficulty=None):
+        """Generate quizzes until the pool reaches target_size, returning how many were added"""
+        key = normalize_key(topic, difficulty)
+        self._purge_hashes()
+        added = 0
+        for _ in range(self.max_rounds):
+            missing = self.target_size - self.size(*key)
+            if missing <= 0:
+                break
+            fresh = self._claim_new(self.generate(key[0] or None, key[1] or None))
+            with self._lock:
+                buffer = self._buffers.setdefault(key, [])
+                buffer.extend(fresh)
+                quizzes = []
+                while len(buffer) >= QUESTIONS_PER_QUIZ and len(quizzes) < missing:
+                    quizzes.append(buffer[:QUESTIONS_PER_QUIZ])
+                    del buffer[:QUESTIONS_PER_QUIZ]
+            if quizzes:
+                now = time.time()
+                with self.engine.begin() as conn:
+                    conn.execute(text(
+                        "INSERT INTO quiz_pool (topic, difficulty, questions, created_at) "
+                        "VALUES (:topic, :difficulty, :questions, :now)"
+                    ), [{"topic": key[0], "difficulty": key[1], "questions": json.dumps(quiz), "now": now}
+                        for quiz in quizzes])
+                added += len(quizzes)
+        with self._lock:
+            self._counters["generated"] += added
+        return added
+
+    def _claim_new(self, questions):
+        """Record the hashes of valid questions, keeping only those never seen before"""
+        fresh = []
+        now = time.time()
+        with self.engine.begin() as conn:
+            for question in questions:
+                if not is_valid_question(question):
+                    self._count("invalid")
+                    continue
+                inserted = conn.execute(text(
+                    "INSERT OR IGNORE INTO quiz_question_hash (hash, created_at) VALUES (:hash, :now)"
+                ), {"hash": question_hash(question), "now": now}).rowcount
+                if inserted:
+                    fresh.append(question)
+                else:
+                    self._count("duplicates")
+        return fresh
+
+    def _purge_hashes(self):
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM quiz_question_hash WHERE created_at < :cutoff"
+            ), {"cutoff": time.time() - self.hash_retention})
+
+    def stats(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT topic, difficulty, COUNT(*) FROM quiz_pool GROUP BY topic, difficulty"
+            )).all()
+        with self._lock:
+            counters = dict(self._counters)
+            refilling = [{"topic": topic, "difficulty": difficulty} for topic, difficulty in self._wanted]
+        return {
+            **counters,
+            "target_size": self.target_size,
+            "low_water": self.low_water,
+            "topics": sorted(topic for topic in self.topics if topic),
+            "pools": [{"topic": topic, "difficulty": difficulty, "size": size} for topic, difficulty, size in rows],
+            "refill_queue": refilling,
+        }
@@ -0,0 +1,93 @@
+"""Quiz score parsing and SQL-side quiz statistics"""
+import re
+from datetime import timedelta
+
+from sqlalchemy import Float, case, cast, func
+
+_SCORE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+def parse_score(score):
+    """Split a score string such as "4/5" into (correct, total), or (None, None)"""
+    match = _SCORE_PATTERN.match(score or "")
+    if not match:
+        return None, None
+    correct, total = int(match.group(1)), int(match.group(2))
+    if total <= 0 or correct > total:
+        return None, None
+    return correct, total
+
+
+def _percent(value):
+    return round(value * 100, 1) if value is not None else None
+
+
+def compute_quiz_stats(session, Quiz, user_id, now, trend_days=30):
+    """Aggregate a user's quiz results with GROUP BY queries over the numeric score columns"""
+    accuracy = cast(Quiz.correct, Float) / Quiz.total
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+
+    def rolling(since):
+        return func.avg(case((Quiz.created_at >= since, accuracy)))
+
+    scored = session.query(Quiz).filter(Quiz.user_id == user_id, Quiz.total > 0)
+
+    overall = scored.with_entities(
+        func.count(Quiz.id),
+        func.sum(Quiz.correct),
+        func.sum(Quiz.total),
+        func.avg(accuracy),
+        func.max(accuracy),
+        rolling(week_ago),
+        rolling(month_ago),
+    ).one()
+
+    per_title = scored.with_entities(
+        Quiz.title,
+        func.count(Quiz.id),
+        func.sum(Quiz.correct),
+        func.sum(Quiz.total),
+        func.avg(accuracy),
+        func.max(accuracy),
+        rolling(week_ago),
+        func.max(Quiz.created_at),
+    ).group_by(Quiz.title).order_by(func.count(Quiz.id).desc()).all()
+
+    day = func.date(Quiz.created_at)
+    daily = scored.filter(Quiz.created_at >= now - timedelta(days=trend_days)).with_entities(
+        day,
+        func.count(Quiz.id),
+        func.avg(accuracy),
+    ).group_by(day).order_by(day).all()
+
+    attempts, correct, total, average, best, last_7, last_30 = overall
+    return {
+        "overall": {
+            "attempts": attempts,
+            "correct": correct or 0,
+            "questions": total or 0,
+            "accuracy": _percent(correct / total) if total else None,
+            "average_accuracy": _percent(average),
+            "best_accuracy": _percent(best),
+            "last_7_days_accuracy": _percent(last_7),
+            "last_30_days_accuracy": _percent(last_30),
+        },
+        "by_title": [
+            {
+                "title": title,
+                "attempts": title_attempts,
+                "accuracy": _percent(title_correct / title_total) if title_total else None,
+                "average_accuracy": _percent(title_average),
+                "best_accuracy": _percent(title_best),
+                "last_7_days_accuracy": _percent(title_last_7),
+                "last_attempt": last_attempt.isoformat() if last_attempt else None,
+            }
+            for (title, title_attempts, title_correct, title_total, title_average,
+                 title_best, title_last_7, last_attempt) in per_title
+        ],
+        "daily": [
+            {"date": date, "attempts": day_attempts, "average_accuracy": _percent(day_average)}
+            for date, day_attempts, day_average in daily
+        ],
+    }
@@ -0,0 +1,79 @@
+"""Shared cache of generated roadmap templates keyed on the requested language"""
+import re
+
+from cache_store import SqlCache
+
+# Common spellings that should share a single cached roadmap
+LANGUAGE_ALIASES = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "golang": "go",
+    "cpp": "c++",
+    "c plus plus": "c++",
+    "csharp": "c#",
+    "c sharp": "c#",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "html": "html/css",
+    "html & css": "html/css",
+    "html and css": "html/css",
+}
+
+_FILLER_WORDS = re.compile(r"\b(programming|language|lang)\b")
+# Only a separate version ("python 3", "java v17"); digits that are part of the
+# name ("es6", "c99", "html5") stay, since those name different things
+_TRAILING_VERSION = re.compile(r"\s+v?\d+(\.\d+)*(\.x)?$")
+
+
+def normalize_language(language):
+    """Map free-text language names such as "Python 3" onto one cache key"""
+    key = (language or "").strip().lower()
+    key = _FILLER_WORDS.sub(" ", key)
+    key = re.sub(r"\s+", " ", key).strip()
+    key = _TRAILING_VERSION.sub("", key).strip() or key
+    return LANGUAGE_ALIASES.get(key, key)
+
+
+class RoadmapCache:
+    """Roadmap templates shared by all users asking for the same language"""
+
+    def __init__(self, engine, ttl=None, max_entries=None):
+        self.store = SqlCache(engine, "roadmap_cache", ttl=ttl, max_entries=max_entries)
+
+    def get_or_generate(self, language, generate, fallback, refresh=False, cacheable=None):
+        """Return the cached roadmap for language, calling generate on a miss.
+
+        ``generate`` should raise when the model response cannot be used; in
+        that case ``fallback`` is returned and nothing is cached. Generated
+        roadmaps for which ``cacheable(roadmap)`` is false are returned
+        without being cached either.
+        """
+        key = normalize_language(language)
+        if not refresh:
+            cached = self.store.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            roadmap = generate(language)
+        except Exception as e:
+            print(f"Roadmap generation failed for '{language}': {e}")
+            return fallback(language)
+
+        if cacheable is None or cacheable(roadmap):
+            self.store.put(key, roadmap)
+        return roadmap
+
+    def invalidate(self, language=None):
+        """Drop one language from the cache, or everything when language is None"""
+        if language is None:
+            self.store.clear()
+        else:
+            self.store.delete(normalize_language(language))
+
+    def stats(self):
+        return self.store.stats()
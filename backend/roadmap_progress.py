@@ -0,0 +1,97 @@
+"""Roadmap templates and per-user completion bitmaps.
+
+A roadmap's sections and modules are immutable once generated, so they are
+stored once per distinct content as a template. Each user's roadmap only
+keeps a bitmap of completed modules, where bit ``i`` is the ``i``-th module
+counting across all sections in order. Bitmaps are stored as hex strings so
+roadmaps are not limited to 64 modules.
+"""
+import hashlib
+import json
+
+
+def encode_bits(bits):
+    return format(bits, "x")
+
+
+def decode_bits(value):
+    return int(value or "0", 16)
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+def split_progress(sections):
+    """Split generated sections into template content and a completion bitmap"""
+    template = []
+    bits = 0
+    index = 0
+    for section in sections:
+        modules = []
+        for module in section.get("modules", []):
+            if module.get("completed"):
+                bits |= 1 << index
+            modules.append({**module, "completed": False})
+            index += 1
+        template.append({**section, "modules": modules})
+    return template, bits
+
+
+def content_hash(sections):
+    """Stable hash of template content, used to share identical roadmaps"""
+    canonical = json.dumps(sections, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def encode_module_counts(sections):
+    return ",".join(str(len(section.get("modules", []))) for section in sections)
+
+
+def decode_module_counts(value):
+    return [int(count) for count in value.split(",")] if value else []
+
+
+def module_bit(module_counts, section_index, module_index):
+    """Return the bit position of a module, raising ValueError for bad indices"""
+    if section_index < 0 or section_index >= len(module_counts):
+        raise ValueError("Invalid section index")
+    if module_index < 0 or module_index >= module_counts[section_index]:
+        raise ValueError("Invalid module index")
+    return sum(module_counts[:section_index]) + module_index
+
+
+def set_bit(bits, index, value):
+    return bits | (1 << index) if value else bits & ~(1 << index)
+
+
+def apply_progress(sections, bits):
+    """Return a copy of template sections with each module's completed flag set"""
+    result = []
+    index = 0
+    for section in sections:
+        modules = []
+        for module in section.get("modules", []):
+            modules.append({**module, "completed": bool(bits >> index & 1)})
+            index += 1
+        result.append({**section, "modules": modules})
+    return result
+
+
+def section_bits(bits, module_counts, section_index):
+    """Return the completion bits of one section, shifted down to start at bit 0"""
+    start = sum(module_counts[:section_index])
+    return bits >> start & ((1 << module_counts[section_index]) - 1)
+
+
+def splice_section_bits(bits, module_counts, section_index, new_section_bits, new_count):
+    """Replace one section's bits with new_section_bits spanning new_count modules.
+
+    Bits of the sections before it are kept in place and those after it move
+    by the change in the section's length.
+    """
+    start = sum(module_counts[:section_index])
+    end = start + module_counts[section_index]
+    below = bits & ((1 << start) - 1)
+    above = bits >> end
+    return below | (new_section_bits << start) | (above << (start + new_count))
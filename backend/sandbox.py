@@ -0,0 +1,392 @@
+"""Local test runner for problem solutions.
+
+Submitted code is run against a problem's examples in a separate, resource
+limited interpreter process, so a wrong answer gets a verdict without a
+Gemini call. Runners are registered per language; only Python is built in.
+
+The rlimits (CPU time, address space, no file writes, no child processes)
+only stop runaway submissions; they do not stop code from reading files or
+opening sockets. So the runner is off unless it is isolated: with
+``isolation="bwrap"`` each run happens in a bubblewrap sandbox as an
+unprivileged user, with no network and no view of the filesystem beyond
+a read-only interpreter. ``isolation="none"`` runs without that and is
+only meant for local development.
+"""
+import ast
+import json
+import math
+import os
+import secrets
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+
+# Executed by a fresh interpreter; reads {"code", "cases", "limits", "result_fd", "nonce"}
+# on stdin and writes {"nonce", "status", "message", "cases"} to the result_fd pipe.
+# Submitted code shares the process and can replace anything in it, so the
+# cases carry only inputs and the harness reports what the solution returned.
+# The parent checks the nonce and the case list, and compares each returned
+# value with its own copy of the expected output.
+PYTHON_HARNESS = r'''
+import ast, inspect, io, json, os, resource, signal, sys
+
+payload = json.loads(sys.stdin.read())
+result_pipe = os.fdopen(payload.pop("result_fd"), "w")
+limits = payload["limits"]
+memory = limits["memory_mb"] * 1024 * 1024
+resource.setrlimit(resource.RLIMIT_CPU, (limits["cpu_seconds"], limits["cpu_seconds"] + 1))
+resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+out = sys.stdout
+
+
+def make_finish(nonce):
+    # The nonce lives only in this closure, not in a global the solution could look up by name
+    def finish(status, message="", cases=()):
+        result_pipe.write(json.dumps({"nonce": nonce, "status": status, "message": message, "cases": list(cases)}))
+        result_pipe.flush()
+        sys.exit(0)
+    return finish
+
+
+finish = make_finish(payload.pop("nonce"))
+
+
+def parse_value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        lowered = text.strip().lower()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+        if lowered in ("null", "none"):
+            return None
+        return text.strip()
+
+
+def parse_args(text):
+    """Turn an example input such as "[1, 2]" or "nums = [1, 2], k = 3" into positional args"""
+    try:
+        return [ast.literal_eval(text)]
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        pass
+    try:
+        call = ast.parse("f(" + text + ")", mode="eval").body
+        return [ast.literal_eval(arg) for arg in call.args] + [ast.literal_eval(kw.value) for kw in call.keywords]
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return [parse_value(text)]
+
+
+def find_entry(tree, namespace):
+    """Pick the function to test, or None when it is not clear which one it is.
+
+    Accepted: the only public method of a Solution class, a function called
+    solve or solution, or the only function defined. Anything else would be
+    a guess, and testing the wrong function turns a guess into a failing verdict.
+    """
+    functions = [node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    for node in classes:
+        if node.name == "Solution":
+            methods = [item.name for item in node.body
+                       if isinstance(item, ast.FunctionDef) and not item.name.startswith("_")]
+            if len(methods) == 1:
+                return getattr(namespace["Solution"](), methods[0])
+    for name in ("solve", "solution"):
+        if name in functions:
+            return namespace[name]
+    return namespace[functions[0]] if len(functions) == 1 else None
+
+
+class CaseTimeout(Exception):
+    pass
+
+
+def on_alarm(signum, frame):
+    raise CaseTimeout()
+
+
+try:
+    tree = ast.parse(payload["code"])
+except SyntaxError as e:
+    finish("failed", "SyntaxError: %s (line %s)" % (e.msg, e.lineno))
+
+namespace = {"__name__": "__solution__"}
+captured = io.StringIO()
+sys.stdout = captured
+try:
+    exec(compile(tree, "<solution>", "exec"), namespace)
+except BaseException as e:
+    sys.stdout = out
+    finish("failed", "%s while loading the solution: %s" % (type(e).__name__, e))
+
+entry = find_entry(tree, namespace)
+if entry is None:
+    sys.stdout = out
+    finish("skipped", "Could not tell which function to test")
+
+try:
+    signature = inspect.signature(entry)
+except (TypeError, ValueError):
+    signature = None
+positional = [parameter for parameter in signature.parameters.values()
+              if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)] if signature else []
+
+signal.signal(signal.SIGALRM, on_alarm)
+results = []
+for case in payload["cases"]:
+    args = parse_args(case["input"])
+    # "1, 2" parses as one tuple; spread it when the function takes that many arguments
+    if len(args) == 1 and isinstance(args[0], tuple) and len(positional) == len(args[0]) > 1:
+        args = list(args[0])
+    if signature is not None:
+        try:
+            signature.bind(*args)
+        except TypeError:
+            # Our reading of the example input, not the solution, is what does not fit
+            sys.stdout = out
+            finish("skipped", "Could not map the example input to the function's parameters")
+    result = {"id": case.get("id")}
+    captured.seek(0)
+    captured.truncate()
+    prints_answer = False
+    signal.setitimer(signal.ITIMER_REAL, limits["case_seconds"])
+    try:
+        actual = entry(*args)
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        prints_answer = actual is None and bool(captured.getvalue().strip())
+        result.update(actual=repr(actual), actual_str=str(actual))
+    except CaseTimeout:
+        result.update(error="Time limit exceeded")
+    except MemoryError:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        result.update(error="Memory limit exceeded")
+    except BaseException as e:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        result.update(error="%s: %s" % (type(e).__name__, e))
+    if prints_answer:
+        sys.stdout = out
+        finish("skipped", "The solution prints its answer instead of returning it")
+    results.append(result)
+
+sys.stdout = out
+finish("ran", "", results)
+'''
+
+
+def run_result(status, message="", cases=()):
+    """Result of a local run.
+
+    ``status`` is "passed" or "failed" for a local verdict, or "skipped" when
+    the submission could not be tested locally and needs another validator.
+    """
+    cases = list(cases)
+    return {
+        "status": status,
+        "message": message,
+        "passed": sum(1 for case in cases if case.get("passed")),
+        "total": len(cases),
+        "cases": cases,
+    }
+
+
+ISOLATION_MODES = ("off", "bwrap", "none")
+
+# Read-only inside the sandbox; everything else, including the app and its database, is absent
+SYSTEM_PATHS = ("/usr", "/bin", "/lib", "/lib64")
+
+
+def bwrap_command(command):
+    """Wrap command in bubblewrap: every namespace unshared (so no network), nobody's uid and a bare filesystem"""
+    args = [
+        "bwrap", "--unshare-all", "--die-with-parent", "--new-session",
+        "--uid", "65534", "--gid", "65534", "--clearenv",
+    ]
+    for path in sorted({sys.base_prefix, sys.prefix, *SYSTEM_PATHS}):
+        if os.path.exists(path):
+            args += ["--ro-bind", path, path]
+    args += [
+        "--proc", "/proc", "--dev", "/dev", "--tmpfs", "/tmp", "--chdir", "/tmp",
+        "--setenv", "PYTHONHASHSEED", "0", "--",
+    ]
+    return args + command
+
+
+def _read_all(fd):
+    with os.fdopen(fd, "rb") as pipe:
+        return pipe.read().decode("utf-8", "replace")
+
+
+def parse_expected(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        lowered = text.strip().lower()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+        if lowered in ("null", "none"):
+            return None
+        return text.strip()
+
+
+def matches(actual_repr, actual_str, expected_text):
+    """Compare a returned value, as reported by the harness, with an example's expected output"""
+    expected = parse_expected(expected_text)
+    try:
+        # Only literals come back as values; any other object is compared by its text
+        actual = ast.literal_eval(actual_repr)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        actual = None
+    else:
+        if actual == expected:
+            return True
+        if isinstance(actual, (int, float)) and isinstance(expected, (int, float)) and not isinstance(actual, bool):
+            return math.isclose(actual, expected, rel_tol=1e-6, abs_tol=1e-9)
+        if isinstance(actual, tuple) and isinstance(expected, list):
+            return list(actual) == expected
+    squash = lambda value: "".join(str(value).split())
+    return squash(actual_str) == squash(expected_text) or squash(actual_repr) == squash(expected_text)
+
+
+def checked_result(output, cases):
+    """Turn the harness output into a run_result, judging every case here rather than in the child.
+
+    The child only reports what the solution returned for each input; a run
+    that executed no cases, or returned a different set, is "skipped".
+    """
+    status, message, results = output.get("status"), output.get("message", ""), output.get("cases") or []
+    if status == "skipped" or (status == "failed" and not results):
+        return run_result(status, message)
+    if not results or [result.get("id") for result in results] != [case["id"] for case in cases]:
+        return run_result("skipped", "The local run did not report every example")
+    judged = []
+    for case, reported in zip(cases, results):
+        result = {"id": case["id"], "input": case["input"], "expected": case["output"]}
+        error, actual_repr = reported.get("error"), reported.get("actual")
+        if error is not None or not isinstance(actual_repr, str):
+            result.update(passed=False, error=str(error or "No result reported"))
+        else:
+            actual_str = reported.get("actual_str")
+            result.update(actual=actual_repr, passed=matches(
+                actual_repr, actual_str if isinstance(actual_str, str) else actual_repr, case["output"]
+            ))
+        judged.append(result)
+    return run_result("passed" if all(result["passed"] for result in judged) else "failed", message, judged)
+
+
+class PythonRunner:
+    language = "python"
+
+    def detects(self, code):
+        """Treat code as Python when it parses and defines a function or class"""
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            return False
+        return any(isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) for node in tree.body)
+
+    def run(self, code, cases, limits, wrap=None):
+        # The verdict comes back on its own pipe, so nothing the solution prints can pose as one
+        read_fd, write_fd = os.pipe()
+        nonce = secrets.token_hex(16)
+        # Expected outputs stay in this process, where the solution cannot read or rewrite the comparison
+        inputs = [{"id": case["id"], "input": case["input"]} for case in cases]
+        payload = json.dumps({"code": code, "cases": inputs, "limits": limits, "result_fd": write_fd, "nonce": nonce})
+        command = [sys.executable, "-I", "-c", PYTHON_HARNESS]
+        wall_timeout = limits["cpu_seconds"] + limits["case_seconds"] * len(cases) + 2
+        received = []
+        reader = threading.Thread(target=lambda: received.append(_read_all(read_fd)), daemon=True)
+        reader.start()
+        try:
+            with tempfile.TemporaryDirectory(prefix="sandbox-") as workdir:
+                try:
+                    completed = subprocess.run(
+                        wrap(command) if wrap else command,
+                        input=payload,
+                        capture_output=True,
+                        text=True,
+                        timeout=wall_timeout,
+                        cwd=workdir,
+                        env={"PATH": os.environ.get("PATH", ""), "PYTHONHASHSEED": "0"},
+                        pass_fds=(write_fd,),
+                    )
+                except subprocess.TimeoutExpired:
+                    return run_result("failed", "Time limit exceeded")
+        finally:
+            os.close(write_fd)
+            reader.join(timeout=5)
+
+        try:
+            output = json.loads(received[0] if received else "")
+            if not isinstance(output, dict) or output.get("nonce") != nonce:
+                raise ValueError("missing or forged result")
+        except ValueError:
+            if completed.returncode in (-signal.SIGXCPU, -signal.SIGKILL):
+                return run_result("failed", "Time limit exceeded")
+            if "MemoryError" in completed.stderr:
+                return run_result("failed", "Memory limit exceeded")
+            print(f"Sandbox produced no result (exit {completed.returncode}): {completed.stderr[-500:]}")
+            return run_result("skipped", "The local runner failed")
+        return checked_result(output, cases)
+
+
+RUNNERS = {}
+
+
+def register_runner(runner):
+    """Make a runner available for its ``language``"""
+    RUNNERS[runner.language] = runner
+
+
+register_runner(PythonRunner())
+
+
+class Sandbox:
+    """Runs solutions locally with at most max_workers subprocesses at a time"""
+
+    def __init__(self, max_workers=4, cpu_seconds=2, case_seconds=1, memory_mb=256, queue_timeout=10,
+                 isolation="off"):
+        if isolation not in ISOLATION_MODES:
+            raise ValueError(f"Unknown sandbox isolation: {isolation}")
+        if isolation == "bwrap" and shutil.which("bwrap") is None:
+            print("bwrap is not installed, so local solution testing is disabled")
+            isolation = "off"
+        if isolation == "none":
+            print("Local solution testing runs submitted code WITHOUT isolation; use this only in development")
+        self.isolation = isolation
+        self.limits = {"cpu_seconds": cpu_seconds, "case_seconds": case_seconds, "memory_mb": memory_mb}
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def runner_for(self, code, language=None):
+        if language:
+            return RUNNERS.get(language.lower())
+        for runner in RUNNERS.values():
+            if runner.detects(code):
+                return runner
+        return None
+
+    def run(self, code, examples, language=None):
+        """Run code against examples ({"id", "input", "output"} dicts) and return a run_result"""
+        if self.isolation == "off":
+            return run_result("skipped", "Local testing is disabled")
+        runner = self.runner_for(code, language)
+        if runner is None:
+            return run_result("skipped", f"No local runner for {language or 'this language'}")
+        cases = [
+            {"id": example.get("id"), "input": str(example["input"]), "output": str(example["output"])}
+            for example in examples if "input" in example and "output" in example
+        ]
+        if not cases:
+            return run_result("skipped", "The problem has no examples to run")
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            return run_result("skipped", "All local runners are busy")
+        try:
+            return runner.run(code, cases, self.limits, bwrap_command if self.isolation == "bwrap" else None)
+        finally:
+            self._slots.release()
@@ -0,0 +1,108 @@
+"""Batch serialization for the list endpoints.
+
+Style lookups are built once at import, "now" is computed once per response,
+stored JSON is parsed once per distinct value, and responses are encoded
+with orjson when it is installed.
+"""
+import json
+from datetime import datetime
+from functools import lru_cache
+
+from flask import Response, jsonify
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# (icon, bgColor, textColor) per quiz title
+QUIZ_STYLES = {
+    "JavaScript": ("<Code className=\"text-yellow-500\" size={16} />", "bg-yellow-100", "text-yellow-600"),
+    "Python": ("<Code className=\"text-blue-600\" size={16} />", "bg-blue-100", "text-blue-600"),
+    "Java": ("<Code className=\"text-orange-500\" size={16} />", "bg-orange-100", "text-orange-600"),
+    "C++": ("<Code className=\"text-purple-500\" size={16} />", "bg-purple-100", "text-purple-600"),
+    "HTML/CSS": ("<Code className=\"text-green-500\" size={16} />", "bg-green-100", "text-green-600"),
+    "React": ("<Code className=\"text-blue-400\" size={16} />", "bg-blue-100", "text-blue-400"),
+    "Node.js": ("<Code className=\"text-green-600\" size={16} />", "bg-green-100", "text-green-600"),
+    "SQL": ("<Database className=\"text-blue-500\" size={16} />", "bg-blue-100", "text-blue-500"),
+}
+DEFAULT_QUIZ_STYLE = ("<Code className=\"text-gray-500\" size={16} />", "bg-gray-100", "text-gray-600")
+
+
+def time_ago(created_at, now):
+    days_ago = (now - created_at).days
+    return f"{days_ago} days ago" if days_ago > 0 else "Today"
+
+
+def serialize_quiz(quiz, now=None):
+    icon, bg_color, text_color = QUIZ_STYLES.get(quiz.title, DEFAULT_QUIZ_STYLE)
+    return {
+        "title": quiz.title,
+        "icon": icon,
+        "bgColor": bg_color,
+        "textColor": text_color,
+        "timeAgo": time_ago(quiz.created_at, now or datetime.utcnow()),
+        "score": quiz.score
+    }
+
+
+def serialize_quizzes(quizzes, now=None):
+    now = now or datetime.utcnow()
+    return [serialize_quiz(quiz, now) for quiz in quizzes]
+
+
+@lru_cache(maxsize=4096)
+def parse_examples(examples):
+    """Parse a problem's stored examples JSON, once per distinct value.
+
+    The result is shared between callers and must not be modified.
+    """
+    return json.loads(examples)
+
+
+def serialize_problem(problem):
+    return {
+        "id": problem.id,
+        "title": problem.title,
+        "difficulty": problem.difficulty,
+        "solved": problem.solved,
+        "category": problem.category,
+        "solution": problem.solution,
+        "examplesList": parse_examples(problem.examples)
+    }
+
+
+def serialize_problems(problems):
+    return [serialize_problem(problem) for problem in problems]
+
+
+def serialize_roadmaps(roadmaps, include_roadmap=True):
+    """Serialize roadmaps, building the sections once per (template, progress) pair"""
+    sections_by_key = {}
+    result = []
+    for roadmap in roadmaps:
+        data = roadmap.to_dict(include_roadmap=False)
+        if include_roadmap:
+            key = (roadmap.template_id, roadmap.completion_bits)
+            if roadmap.template_id is None:
+                data["roadmap"] = roadmap.sections()
+            else:
+                if key not in sections_by_key:
+                    sections_by_key[key] = roadmap.sections()
+                data["roadmap"] = sections_by_key[key]
+        result.append(data)
+    return result
+
+
+def dumps(data):
+    """Encode data as JSON bytes, with orjson when it is available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(data):
+    """Build a JSON response, skipping Flask's provider when orjson is installed"""
+    if orjson is None:
+        return jsonify(data)
+    return Response(orjson.dumps(data), mimetype="application/json")
@@ -0,0 +1,68 @@
+"""Signed session tokens and a small in-process user cache"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# The user fields routes actually need, so they can skip loading the full row
+CachedUser = namedtuple("CachedUser", ["id", "email", "name", "interest"])
+CachedUser.__new__.__defaults__ = (None, None)
+
+
+class SessionTokens:
+    """Issues and verifies HMAC-SHA256 signed tokens carrying the user id"""
+
+    def __init__(self, secret_key, max_age):
+        self.max_age = max_age
+        self.serializer = URLSafeTimedSerializer(
+            secret_key,
+            salt="session-token",
+            signer_kwargs={"digest_method": hashlib.sha256}
+        )
+
+    def issue(self, user):
+        return self.serializer.dumps({"uid": user.id, "email": user.email})
+
+    def verify(self, token):
+        """Return the CachedUser carried by a valid token, or None"""
+        try:
+            payload = self.serializer.loads(token, max_age=self.max_age)
+        except BadSignature:
+            # Also covers SignatureExpired
+            return None
+        return CachedUser(id=payload["uid"], email=payload["email"])
+
+
+class UserCache:
+    """LRU cache of CachedUser rows looked up by email, with a short TTL"""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_by_email(self, email, loader):
+        """Return the cached user for email, calling loader(email) on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(email)
+                return entry[0]
+
+        user = loader(email)
+        # Unknown emails are not cached so a later signup is seen at once
+        if user is not None:
+            with self._lock:
+                self._entries[email] = (user, now)
+                self._entries.move_to_end(email)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, email):
+        with self._lock:
+            self._entries.pop(email, None)
@@ -0,0 +1,131 @@
+"""Coalescing of identical in-flight requests across threads and worker processes.
+
+The first caller for a key claims a row in the ``single_flight`` table and
+runs the work; concurrent callers with the same key wait for its result
+instead of repeating the upstream call and the database write. Threads in
+the same process wait on an event, other processes poll the row. Finished
+results stay readable for ``result_ttl`` seconds, so a double click that
+arrives just after the first request completed is coalesced as well. Only
+claiming writes to the table; waiters poll it with plain reads.
+"""
+import json
+import threading
+import time
+import uuid
+
+from sqlalchemy import text
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs fn once per key at a time; fn must return a ``(payload, status_code)`` tuple"""
+
+    def __init__(self, engine, lease=120, result_ttl=10, poll_interval=0.1):
+        self.engine = engine
+        self.lease = lease
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._ensure_table()
+
+    def _ensure_table(self):
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS single_flight ("
+                "flight_key TEXT PRIMARY KEY, "
+                "owner TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, "
+                "finished_at REAL, "
+                "status_code INTEGER, "
+                "result TEXT)"
+            ))
+
+    def do(self, key, fn, *args, replay=True, **kwargs):
+        """Return ``((payload, status_code), shared)``, where shared means another caller did the work.
+
+        With ``replay=False`` (a deliberate refresh or regenerate) a result that
+        finished before this call is never returned; only a run still in flight
+        is shared.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result, shared = self._do_across_processes(key, fn, args, kwargs, replay)
+            return call.result, shared
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _claim(self, key, owner, clear_result):
+        """Try to insert the claim row, returning whether this caller owns the key"""
+        now = time.time()
+        with self.engine.begin() as conn:
+            # Drop abandoned claims and results past their reuse window; a new
+            # request also retries a failed result instead of replaying it
+            conn.execute(text(
+                "DELETE FROM single_flight WHERE (finished_at IS NULL AND expires_at < :now) "
+                "OR finished_at < :cutoff "
+                "OR (flight_key = :key AND (status_code >= 500 OR (:clear AND finished_at IS NOT NULL)))"
+            ), {"now": now, "cutoff": now - self.result_ttl, "key": key, "clear": clear_result})
+            return conn.execute(text(
+                "INSERT OR IGNORE INTO single_flight (flight_key, owner, expires_at) "
+                "VALUES (:key, :owner, :expires_at)"
+            ), {"key": key, "owner": owner, "expires_at": now + self.lease}).rowcount == 1
+
+    def _do_across_processes(self, key, fn, args, kwargs, replay):
+        owner = uuid.uuid4().hex
+        claimed = self._claim(key, owner, clear_result=not replay)
+        while not claimed:
+            # Waiting only reads, so waiters never queue for SQLite's write lock
+            with self.engine.connect() as conn:
+                row = conn.execute(text(
+                    "SELECT status_code, result, expires_at FROM single_flight WHERE flight_key = :key"
+                ), {"key": key}).first()
+            if row is not None and row.result is not None:
+                return (json.loads(row.result), row.status_code), True
+            if row is None or row.expires_at < time.time():
+                # The owner failed or gave up on its lease, so try to take over
+                claimed = self._claim(key, owner, clear_result=False)
+                continue
+            time.sleep(self.poll_interval)
+        return self._run_claimed(key, owner, fn, args, kwargs), False
+
+    def _run_claimed(self, key, owner, fn, args, kwargs):
+        try:
+            payload, status_code = fn(*args, **kwargs)
+        except BaseException:
+            # Let a waiting caller claim the key and try for itself
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    "DELETE FROM single_flight WHERE flight_key = :key AND owner = :owner"
+                ), {"key": key, "owner": owner})
+            raise
+
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE single_flight SET result = :result, status_code = :status_code, finished_at = :now "
+                "WHERE flight_key = :key AND owner = :owner"
+            ), {"result": json.dumps(payload), "status_code": status_code, "now": time.time(),
+                "key": key, "owner": owner})
+        return payload, status_code
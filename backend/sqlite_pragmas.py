@@ -0,0 +1,42 @@
+"""Per-connection SQLite settings for running the backend with many concurrent writers.
+
+SQLite's defaults (rollback journal, no busy timeout, synchronous=FULL) make
+a second writer fail at once with "database is locked". WAL mode lets
+readers proceed while one connection writes, busy_timeout makes writers
+queue for the lock instead of failing, and synchronous=NORMAL is durable
+across application crashes in WAL mode while skipping an fsync per commit.
+"""
+from sqlalchemy import event
+
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 5000,  # Milliseconds a writer waits for the lock
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,  # Bytes of the file to memory-map for reads
+    "cache_size": -64000,  # Negative values are KiB, so about 64 MB per connection
+}
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    # busy_timeout goes first so switching the journal mode waits for other writers too
+    ordered = sorted(pragmas.items(), key=lambda item: item[0] != "busy_timeout")
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in ordered:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure_sqlite(engine, pragmas=None):
+    """Apply pragmas to every new connection of engine; other databases are left alone"""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    # Connections opened before the listener was registered predate the settings
+    engine.dispose()
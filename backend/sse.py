@@ -0,0 +1,21 @@
+"""Helpers for writing server-sent events (SSE) responses"""
+import json
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Stop nginx from buffering the stream
+}
+
+
+def sse_event(data, event=None):
+    """Format one server-sent event with a JSON payload"""
+    message = ""
+    if event:
+        message += f"event: {event}\n"
+    message += f"data: {json.dumps(data)}\n\n"
+    return message
+
+
+def sse_comment(comment="keep-alive"):
+    """Format an SSE comment line, used as a heartbeat"""
+    return f": {comment}\n\n"
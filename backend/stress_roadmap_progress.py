@@ -0,0 +1,118 @@
+"""Stress concurrent progress updates on one roadmap and check that none are lost.
+
+Many threads toggle modules of a single roadmap through
+``/update-module-status`` at the same time, each thread owning a disjoint
+set of modules. Every thread finishes by setting its modules to a known
+final value, so the stored bitmap must match exactly; any difference is
+an update that another request overwrote. Runs on a scratch database:
+``python stress_roadmap_progress.py --threads 16 --rounds 20``
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import roadmap_progress
+
+
+def create_roadmap(sections, modules):
+    with backend.app.app_context():
+        user = backend.User(name="stress", email="stress@example.com", password="x")
+        backend.db.session.add(user)
+        backend.db.session.flush()
+        roadmap = backend.Roadmap.from_sections(
+            [
+                {"title": f"Section {s}", "description": "",
+                 "modules": [{"name": f"Module {s}.{m}", "completed": False} for m in range(modules)]}
+                for s in range(sections)
+            ],
+            name="Stress", description="", user_id=user.id, email=user.email
+        )
+        backend.db.session.add(roadmap)
+        backend.db.session.commit()
+        return roadmap.id
+
+
+def final_value(section_index, module_index):
+    return (section_index + module_index) % 3 == 0
+
+
+def worker(roadmap_id, owned, rounds, statuses, lock):
+    client = backend.app.test_client()
+
+    def toggle(section_index, module_index, completed):
+        # A 409 means the server gave up retrying; a real client would try again
+        while True:
+            response = client.get('/update-module-status', query_string={
+                'roadmap_id': roadmap_id, 'section_index': section_index,
+                'module_index': module_index, 'completed': str(completed).lower()
+            })
+            with lock:
+                statuses[response.status_code] += 1
+            if response.status_code != 409:
+                return
+
+    for _ in range(rounds - 1):
+        section_index, module_index = random.choice(owned)
+        toggle(section_index, module_index, random.random() < 0.5)
+    for section_index, module_index in owned:
+        toggle(section_index, module_index, final_value(section_index, module_index))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20, help="Toggles per thread before its final writes")
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--modules", type=int, default=8, help="Modules per section")
+    args = parser.parse_args()
+
+    roadmap_id = create_roadmap(args.sections, args.modules)
+    modules = [(s, m) for s in range(args.sections) for m in range(args.modules)]
+    owned = [modules[t::args.threads] for t in range(args.threads)]
+    statuses, lock = Counter(), threading.Lock()
+
+    threads = [
+        threading.Thread(target=worker, args=(roadmap_id, owned[t], args.rounds, statuses, lock))
+        for t in range(args.threads) if owned[t]
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    with backend.app.app_context():
+        roadmap = backend.db.session.get(backend.Roadmap, roadmap_id)
+        _, module_counts = backend.load_template(roadmap.template_id)
+        stored = roadmap_progress.decode_bits(roadmap.completion_bits)
+        lost = [
+            (s, m) for s, m in modules
+            if bool(stored >> roadmap_progress.module_bit(module_counts, s, m) & 1) != final_value(s, m)
+        ]
+        expected_completed = sum(final_value(s, m) for s, m in modules)
+        completed, lessons, version = roadmap.completed, roadmap.lessons, roadmap.version
+        # Closes the scratch database so its directory can be removed
+        backend.db.engine.dispose()
+
+    requests = sum(statuses.values())
+    print(f"{len(threads)} threads, {requests} requests in {elapsed:.2f}s ({requests / elapsed:.0f}/s)")
+    print(f"Responses: {dict(sorted(statuses.items()))}; roadmap version {version}")
+    print(f"Lost updates: {len(lost)} {lost[:10] if lost else ''}")
+    print(f"Counters: completed={completed}/{lessons}, expected {expected_completed}/{len(modules)}")
+    counters_ok = completed == expected_completed and lessons == len(modules)
+    return 0 if not lost and counters_ok and set(statuses) <= {200, 409} else 1
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory(prefix="stress_progress_") as directory:
+        # app reads DATABASE_URL when it is imported
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(directory, "stress.db")
+        import app as backend
+        status = main()
+    sys.exit(status)
@@ -0,0 +1,170 @@
+"""Structured JSON generation on top of the shared Gemini client.
+
+Each call asks Gemini for JSON matching a response schema, validates the
+reply against the endpoint's schema, and makes at most one repair request
+that quotes the validation errors back to the model. Parse failures, repairs
+and fallbacks are counted per endpoint.
+"""
+import json
+import re
+import threading
+import time
+
+# Schema keywords Gemini accepts in response_schema; the rest are only checked locally
+UPSTREAM_SCHEMA_KEYS = {"type", "format", "description", "nullable", "enum", "items", "properties", "required"}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+class StructuredOutputError(Exception):
+    """Raised when a reply still does not match its schema after the repair retry"""
+
+
+def upstream_schema(schema):
+    """Strip the keywords Gemini does not understand from a schema"""
+    result = {key: value for key, value in schema.items() if key in UPSTREAM_SCHEMA_KEYS}
+    if "items" in result:
+        result["items"] = upstream_schema(result["items"])
+    if "properties" in result:
+        result["properties"] = {name: upstream_schema(sub) for name, sub in result["properties"].items()}
+    return result
+
+
+def validate(value, schema, path="$"):
+    """Return a list of human-readable schema violations, empty when value is valid"""
+    expected = _TYPES[schema["type"]]
+    # bool is a subclass of int, but true is not a valid integer
+    if not isinstance(value, expected) or (isinstance(value, bool) and schema["type"] in ("integer", "number")):
+        return [f"{path} must be of type {schema['type']}"]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path} must be one of {schema['enum']}")
+    if schema["type"] == "string" and len(value.strip()) < schema.get("minLength", 0):
+        errors.append(f"{path} must not be empty")
+    if schema["type"] in ("integer", "number"):
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append(f"{path} must be at least {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append(f"{path} must be at most {schema['maximum']}")
+    if schema["type"] == "array":
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path} must have at least {schema['minItems']} items")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path} must have at most {schema['maxItems']} items")
+        for index, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{index}]"))
+    if schema["type"] == "object":
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"{path}.{name} is required")
+        for name, sub_schema in schema.get("properties", {}).items():
+            if name in value and value[name] is not None:
+                errors.extend(validate(value[name], sub_schema, f"{path}.{name}"))
+    return errors
+
+
+def extract_json(raw_text):
+    """Parse JSON from a reply, tolerating markdown fences and surrounding prose"""
+    text = raw_text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # Fall back to the outermost object or array in the text
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        raise ValueError("Reply contains no JSON")
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    return json.loads(text[start:end + 1])
+
+
+class StructuredGenerator:
+    """Generates schema-valid JSON through a GeminiClient"""
+
+    def __init__(self, client):
+        self.client = client
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            counters = self._metrics.setdefault(endpoint, {
+                "calls": 0, "valid": 0, "repaired": 0, "parse_failures": 0, "fallbacks": 0
+            })
+            counters[name] += 1
+
+    def _parse(self, raw_text, schema):
+        try:
+            value = extract_json(raw_text)
+        except ValueError as e:
+            return None, [f"Reply is not valid JSON: {e}"]
+        return value, validate(value, schema)
+
+    def generate(self, endpoint, prompt, schema, timeout=None):
+        """Return the parsed reply for prompt, raising StructuredOutputError if it stays invalid.
+
+        GeminiUnavailable propagates unchanged so callers can use their fallback.
+        The endpoint's latency budget (or timeout) covers the repair request too.
+        """
+        self._count(endpoint, "calls")
+        deadline = time.monotonic() + (timeout or self.client.budget(endpoint))
+        generation_config = {
+            "response_mime_type": "application/json",
+            "response_schema": upstream_schema(schema),
+        }
+        raw_text = self.client.generate(prompt, timeout=timeout, endpoint=endpoint, generation_config=generation_config)
+        value, errors = self._parse(raw_text, schema)
+        if not errors:
+            self._count(endpoint, "valid")
+            return value
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._count(endpoint, "parse_failures")
+            raise StructuredOutputError(f"Invalid {endpoint} reply and no time left for a repair: {errors[:5]}")
+
+        # One targeted repair: show the model its reply and what is wrong with it
+        print(f"Invalid {endpoint} reply from Gemini, requesting a repair: {errors[:5]}")
+        repair_prompt = (
+            f"{prompt}\n\nYour previous reply was:\n{raw_text[:4000]}\n\n"
+            "It does not match the required JSON schema:\n- " + "\n- ".join(errors[:10]) +
+            "\n\nReturn the corrected JSON only."
+        )
+        raw_text = self.client.generate(repair_prompt, timeout=remaining, endpoint=endpoint,
+                                        generation_config=generation_config)
+        value, errors = self._parse(raw_text, schema)
+        if not errors:
+            self._count(endpoint, "repaired")
+            return value
+
+        self._count(endpoint, "parse_failures")
+        raise StructuredOutputError(f"Invalid {endpoint} reply after repair: {errors[:5]}")
+
+    def record_call(self, endpoint):
+        """Count a request for endpoint that is built from calls made under other names, e.g. a fan-out"""
+        self._count(endpoint, "calls")
+
+    def record_fallback(self, endpoint):
+        """Count a response served from fallback content instead of Gemini output"""
+        self._count(endpoint, "fallbacks")
+
+    def stats(self):
+        with self._lock:
+            metrics = {endpoint: dict(counters) for endpoint, counters in self._metrics.items()}
+        for counters in metrics.values():
+            calls = counters["calls"]
+            counters["parse_failure_rate"] = round(counters["parse_failures"] / calls, 4) if calls else 0.0
+            counters["fallback_rate"] = round(counters["fallbacks"] / calls, 4) if calls else 0.0
+        return metrics
@@ -0,0 +1,132 @@
+"""Cache of solution verdicts, so a resubmitted solution is not validated again"""
+import ast
+import hashlib
+import io
+import json
+import tokenize
+
+from cache_store import SqlCache
+
+# Languages whose comments are // and /* */ and whose strings are quoted with " ' or `
+C_STYLE_LANGUAGES = {
+    "c", "c++", "cpp", "c#", "csharp", "java", "javascript", "js", "typescript", "ts",
+    "go", "golang", "kotlin", "swift", "scala", "dart", "rust", "php",
+}
+
+
+def strip_c_comments(code):
+    """Drop // and /* */ comments and collapse whitespace, leaving string literals untouched.
+
+    Returns None when a literal or block comment is left open, since the
+    code is then not what the scanner assumes it is.
+    """
+    out, word, i, n = [], [], 0, len(code)
+
+    def end_word():
+        if word:
+            out.append("".join(word))
+            word.clear()
+
+    while i < n:
+        char = code[i]
+        if char in "\"'`":
+            end = i + 1
+            while end < n and code[end] != char:
+                end += 2 if code[end] == "\\" else 1
+            if end >= n:
+                return None
+            word.append(code[i:end + 1])
+            i = end + 1
+        elif code.startswith("//", i):
+            end_word()
+            i = code.find("\n", i)
+            i = n if i == -1 else i
+        elif code.startswith("/*", i):
+            end_word()
+            end = code.find("*/", i + 2)
+            if end == -1:
+                return None
+            i = end + 2
+        elif char.isspace():
+            end_word()
+            i += 1
+        else:
+            word.append(char)
+            i += 1
+    end_word()
+    return " ".join(out)
+
+
+def normalize_whitespace(code):
+    """Only line endings, trailing spaces and blank lines; spacing inside a line may be significant"""
+    lines = (line.rstrip() for line in code.replace("\r\n", "\n").replace("\r", "\n").split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def normalize_solution(code, language=None):
+    """Drop comments and insignificant whitespace from a solution.
+
+    Python is normalized token by token, so indentation still distinguishes
+    blocks. Code in a C-style language has comments stripped by a scanner
+    that skips string literals. Anything else, including Python that does
+    not parse, keeps its comments, so two different solutions never share
+    a key.
+    """
+    try:
+        ast.parse(code)
+        tokens = []
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENDMARKER):
+                continue
+            if token.type == tokenize.INDENT:
+                tokens.append("<indent>")
+            elif token.type == tokenize.DEDENT:
+                tokens.append("<dedent>")
+            elif token.type == tokenize.NEWLINE:
+                tokens.append("\n")
+            else:
+                tokens.append(token.string)
+        return " ".join(tokens)
+    except (tokenize.TokenError, SyntaxError, ValueError):
+        pass
+    if (language or "").strip().lower() in C_STYLE_LANGUAGES:
+        stripped = strip_c_comments(code)
+        if stripped is not None:
+            return stripped
+    return normalize_whitespace(code)
+
+
+def problem_fingerprint(problem):
+    """Hash of everything about a problem that can change its verdicts"""
+    content = json.dumps(
+        [problem.title, problem.difficulty, problem.category, problem.solution, problem.examples]
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class VerdictCache:
+    """Verdicts keyed by (problem id, normalized solution hash, prompt version).
+
+    The problem's fingerprint is part of the key as well, so editing a problem
+    or bumping the prompt version leaves the old entries unreachable; they
+    expire through the TTL and LRU eviction of the underlying store.
+    """
+
+    def __init__(self, engine, ttl=None, max_entries=None):
+        self.store = SqlCache(engine, "verdict_cache", ttl=ttl, max_entries=max_entries)
+
+    def key(self, problem, solution, prompt_version, language=None):
+        solution_hash = hashlib.sha256(normalize_solution(solution, language).encode("utf-8")).hexdigest()
+        return f"{problem.id}:{problem_fingerprint(problem)}:{solution_hash}:{prompt_version}:{language or ''}"
+
+    def get(self, problem, solution, prompt_version, language=None):
+        return self.store.get(self.key(problem, solution, prompt_version, language))
+
+    def put(self, problem, solution, prompt_version, verdict, language=None):
+        self.store.put(self.key(problem, solution, prompt_version, language), verdict)
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self):
+        return self.store.stats()
@@ -0,0 +1,235 @@
+"""In-process write-behind queue that batches small writes into shared transactions.
+
+Progress clicks and quiz saves are tiny writes, but each one used to be its
+own transaction, and SQLite serializes every writer on one lock. Requests
+here only queue the write; a flusher thread commits everything queued in
+the last ``interval`` seconds in a single transaction. Writes with a key
+are coalesced, so a module toggled several times within one interval is
+written once with its last value; writes without a key (inserts) are all
+kept, in order.
+
+``durability`` picks what a request waits for:
+
+- ``"group"``: the request blocks until the batch holding its write has
+  committed (group commit). Every acknowledged write is committed, and
+  one commit is shared by every request in the interval.
+- ``"async"``: the request returns as soon as the write is queued. Up to
+  one interval of acknowledged writes is lost if the process dies without
+  a clean shutdown. A failed batch is retried on its own, up to
+  ``max_retries`` times; after that each of its writes is tried alone and
+  the ones that still fail go to the dead-letter log.
+"""
+import json
+import threading
+import time
+
+DURABILITY_MODES = ("group", "async")
+
+
+class WriteBehindQueue:
+    """Coalesces writes per key and hands them to ``apply(items)`` in batches.
+
+    ``apply`` receives a list of ``(key, value)`` pairs and must write them
+    all in one transaction, raising if the transaction failed.
+    """
+
+    def __init__(self, apply, interval=0.05, max_batch=500, durability="group",
+                 max_retries=3, dead_letter_path=None):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.apply = apply
+        self.interval = interval
+        self.max_batch = max_batch
+        self.durability = durability
+        self.max_retries = max_retries
+        self.dead_letter_path = dead_letter_path
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._appends = []
+        self._users = {}
+        self._flushing = {}
+        self._flushing_users = {}
+        # Async mode only: a failed batch held back from newer writes until it commits or is dead-lettered
+        self._retry = []
+        self._retry_users = {}
+        self._retry_attempts = 0
+        self._batch = 0
+        self._flushed = -1
+        self._failed = {}
+        self._closed = False
+        self._thread = None
+        self._counters = {"queued": 0, "coalesced": 0, "batches": 0, "written": 0, "failed_batches": 0,
+                          "dead_lettered": 0}
+
+    def put(self, user_id, key, value):
+        """Queue value under key (None to always append) and wait as the durability mode requires"""
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            if key is None:
+                self._appends.append((None, value))
+            else:
+                if key in self._pending:
+                    self._counters["coalesced"] += 1
+                self._pending[key] = value
+            self._users[user_id] = self._users.get(user_id, 0) + 1
+            self._counters["queued"] += 1
+            batch = self._batch
+            # Started lazily so that forked worker processes each get their own thread
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            # Wakes an idle flusher, or one waiting out the interval if the batch is now full
+            self._changed.notify_all()
+
+            if self.durability == "async":
+                return
+            while self._flushed < batch:
+                self._changed.wait()
+            error = self._failed.get(batch)
+        if error is not None:
+            raise error
+
+    def has_pending(self, user_id):
+        # Users of the batch being committed still count until the commit is done
+        with self._lock:
+            return user_id in self._users or user_id in self._flushing_users or user_id in self._retry_users
+
+    def pending(self, match):
+        """Return the queued and not yet committed values of the keys for which match(key) is true"""
+        with self._lock:
+            retrying = {key: value for key, value in self._retry if key is not None}
+            merged = {**retrying, **self._flushing, **self._pending}
+        return {key: value for key, value in merged.items() if match(key)}
+
+    def _take(self):
+        with self._lock:
+            batch = self._batch
+            self._batch += 1
+            if self._retry:
+                # Retried alone, so a write that can never commit does not take newer ones down with it
+                items = self._retry
+                self._flushing = {key: value for key, value in items if key is not None}
+                self._flushing_users = self._retry_users
+                self._retry, self._retry_users = [], {}
+                return batch, items, True
+            items = list(self._pending.items()) + self._appends
+            self._flushing = self._pending
+            self._flushing_users = self._users
+            self._pending, self._appends, self._users = {}, [], {}
+            self._retry_attempts = 0
+            return batch, items, False
+
+    def _hold_for_retry(self, items):
+        """Keep a failed async batch for another try, or return it once it has used up its retries"""
+        with self._lock:
+            self._retry_attempts += 1
+            if self._retry_attempts <= self.max_retries:
+                # Newer writes for the same keys stay queued behind it, so they still win
+                self._retry = items
+                self._retry_users = self._flushing_users
+                return None
+            self._retry_attempts = 0
+            return items
+
+    def _dead_letter(self, items, error):
+        # Written one at a time so that only the writes that cannot commit are given up on
+        written, dead = 0, []
+        for item in items:
+            try:
+                self.apply([item])
+                written += 1
+            except Exception as e:
+                dead.append({"key": item[0], "value": item[1], "error": str(e) or type(e).__name__})
+        print(f"Write-behind gave up on a batch after {self.max_retries} retries ({error}): "
+              f"{written} writes committed alone, {len(dead)} dead-lettered")
+        if dead and self.dead_letter_path:
+            try:
+                with open(self.dead_letter_path, "a") as log:
+                    for entry in dead:
+                        log.write(json.dumps({"time": time.time(), **entry}, default=str) + "\n")
+            except OSError as e:
+                print(f"Could not write the write-behind dead-letter log: {e}")
+        for entry in dead:
+            print(f"Dead-lettered write {entry['key']!r}: {entry['error']}")
+        return written, len(dead)
+
+    def flush(self):
+        """Commit everything queued so far on the calling thread"""
+        with self._flush_lock:
+            while True:
+                batch, items, retried = self._take()
+                error = None
+                written, dead = 0, 0
+                if items:
+                    try:
+                        self.apply(items)
+                    except Exception as e:
+                        error = e
+                        print(f"Write-behind flush of {len(items)} writes failed: {e}")
+                        if self.durability == "async":
+                            exhausted = self._hold_for_retry(items)
+                            if exhausted:
+                                written, dead = self._dead_letter(exhausted, error)
+                with self._changed:
+                    if items and error is None:
+                        self._counters["batches"] += 1
+                        self._counters["written"] += len(items)
+                    elif items:
+                        self._counters["failed_batches"] += 1
+                        self._counters["written"] += written
+                        self._counters["dead_lettered"] += dead
+                    if error is not None and self.durability == "group":
+                        self._failed[batch] = error
+                    # Only waiters of recent batches can still be looking for their error
+                    for old in [old for old in self._failed if old < batch - 100]:
+                        del self._failed[old]
+                    self._flushed = batch
+                    self._flushing = {}
+                    self._flushing_users = {}
+                    self._changed.notify_all()
+                    # Once a held-back batch is out of the way, the writes queued behind it go too
+                    if not retried or self._retry:
+                        return error is None
+
+    def _run(self):
+        while True:
+            with self._changed:
+                while not self._pending and not self._appends and not self._retry and not self._closed:
+                    self._changed.wait()
+                if self._closed:
+                    return
+                retrying = bool(self._retry)
+                # Back off between retries of a failed batch
+                delay = self.interval * 2 ** self._retry_attempts if retrying else self.interval
+            # Let the batch fill for one interval unless it is already full
+            deadline = time.monotonic() + delay
+            with self._changed:
+                while ((retrying or len(self._pending) + len(self._appends) < self.max_batch)
+                       and time.monotonic() < deadline and not self._closed):
+                    self._changed.wait(deadline - time.monotonic())
+            self.flush()
+
+    def close(self):
+        """Stop the flusher and commit whatever is still queued; called on shutdown"""
+        with self._changed:
+            if self._closed:
+                return
+            self._closed = True
+            self._changed.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        # Each failed flush brings a held-back batch closer to the dead-letter log
+        while self._retry or self._pending or self._appends:
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                "pending": len(self._pending) + len(self._appends) + len(self._retry),
+                "durability": self.durability,
+                "interval_ms": int(self.interval * 1000)
+            }
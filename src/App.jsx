@@ -3,6 +3,7 @@ import reactLogo from './assets/react.svg'
 import viteLogo from '/vite.svg'
 import './App.css'
 import { BrowserRouter as Router, Routes, Route, Navigate, useNavigate } from 'react-router-dom'
+import axios from 'axios'
 import AuthPage from './comp/LoginPage'
 import Dashboard from './comp/Dashboard'
 
@@ -24,8 +25,24 @@ function App() {
       setIsLoggedIn(!!userEmail); // Convert to boolean (true if exists, false if not)
     };
     
+    // Verify the signed session token once on load; this only checks the
+    // signature on the server and never touches the database
+    const verifySession = async () => {
+      if (!getCookie('user_email')) return;
+      try {
+        await axios.get('/api/session');
+      } catch (error) {
+        if (error.response?.status === 401) {
+          // Token missing or expired, so ask the user to sign in again
+          document.cookie = 'user_email=; expires=Thu, 01 Jan 1970 00:00:00 UTC; path=/;';
+          setIsLoggedIn(false);
+        }
+      }
+    };
+    
     // Check initially
     checkAuth();
+    verifySession();
     
     // Set up an interval to check periodically (optional)
     const intervalId = setInterval(checkAuth, 5000);
@@ -38,6 +55,8 @@ function App() {
   const handleLogout = () => {
     // Clear the user_email cookie
     document.cookie = 'user_email=; expires=Thu, 01 Jan 1970 00:00:00 UTC; path=/;';
+    // The session token cookie is HttpOnly, so the server has to clear it
+    axios.post('/api/logout').catch((error) => console.error('Error logging out:', error));
     setIsLoggedIn(false);
   };
 
@@ -1,10 +1,37 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
+import axios from 'axios';
 import { Calendar, ChevronRight, Award, Play, Brain, Book, Clock } from 'lucide-react';
 import { XPChart, StreakGraph, TopicProgress } from './ChartComponents';
 import Header from './Header';
 
+// Function to get cookie value by name
+const getCookie = (name) => {
+  const value = `; ${document.cookie}`;
+  const parts = value.split(`; ${name}=`);
+  if (parts.length === 2) return parts.pop().split(';').shift();
+  return null;
+};
+
 const DashboardContent = ({ userData }) => {
+  const [quizStats, setQuizStats] = useState(null);
+
+  // Fetch aggregated quiz statistics for the logged in user
+  useEffect(() => {
+    const userEmail = getCookie('user_email');
+    if (!userEmail) return;
+
+    axios.get('/api/quiz-stats', { params: { email: userEmail } })
+      .then((response) => setQuizStats(response.data))
+      .catch((error) => console.error('Error loading quiz stats:', error));
+  }, []);
+
+  // Fall back to the placeholder numbers until real stats are available
+  const completedQuizzes = quizStats ? quizStats.overall.attempts : userData.quizAttempts.completed;
+  const topicProgress = quizStats && quizStats.by_title.length > 0
+    ? quizStats.by_title.map((item) => ({ topic: item.title, progress: Math.round(item.accuracy || 0) }))
+    : userData.topicProgress;
+
   return (
     <>
      {/* <Header userData={userData} /> */}
@@ -130,7 +157,7 @@ const DashboardContent = ({ userData }) => {
             </div>
             <h3 className="text-lg font-bold text-center mb-2">Quiz Attempts</h3>
             <p className="text-center text-gray-600">
-              Completed: {userData.quizAttempts.completed} | Pending: {userData.quizAttempts.pending}
+              Completed: {completedQuizzes} | Pending: {userData.quizAttempts.pending}
             </p>
           </motion.div>
           
@@ -361,7 +388,7 @@ const DashboardContent = ({ userData }) => {
           >
             <h2 className="text-xl font-bold mb-2">Topic Progress</h2>
             <p className="text-gray-500 text-sm mb-4">Your progress across different subjects</p>
-            <TopicProgress topicProgress={userData.topicProgress} />
+            <TopicProgress topicProgress={topicProgress} />
           </motion.div>
         </div>
         
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import axios from 'axios';
 
@@ -145,7 +145,9 @@ const SubjectsContent = () => {
   const [isVideoModalOpen, setIsVideoModalOpen] = useState(false);
   const [isVideoLoading, setIsVideoLoading] = useState(false);
   const [videoError, setVideoError] = useState('');
+  const [isVideoStreaming, setIsVideoStreaming] = useState(false);
   const [currentModuleInfo, setCurrentModuleInfo] = useState(null);
+  const explanationStreamRef = useRef(null);
   
   // Fetch user roadmaps from API
   const fetchUserRoadmaps = async () => {
@@ -246,10 +248,23 @@ const SubjectsContent = () => {
     setSelectedSubject(null);
   };
   
+  // Stop any explanation that is still streaming in
+  const closeExplanationStream = () => {
+    if (explanationStreamRef.current) {
+      explanationStreamRef.current.close();
+      explanationStreamRef.current = null;
+    }
+    setIsVideoStreaming(false);
+  };
+  
+  // Close the stream if the component unmounts mid-generation
+  useEffect(() => closeExplanationStream, []);
+  
   // Handle starting a learning module by fetching video content
   const handleStartLearning = async (subject, section, module) => {
     try {
       // Open modal first and show loading state
+      closeExplanationStream();
       setIsVideoModalOpen(true);
       setIsVideoLoading(true);
       setVideoError('');
@@ -272,14 +287,40 @@ const SubjectsContent = () => {
         subtopic: module.name
       };
       
-      // Call the API to find learning videos
-      const response = await axios.get('/api/find-learning-video', { params });
+      // Stream the explanation so text shows up as soon as Gemini starts writing
+      const query = new URLSearchParams({ ...params, stream: 'true' });
+      const events = new EventSource(`/api/find-learning-video?${query}`);
+      explanationStreamRef.current = events;
+      setIsVideoStreaming(true);
       
-      // Set the video data and loading state
-      setVideoData(response.data);
-      setIsVideoLoading(false);
+      let explanation = '';
+      events.addEventListener('chunk', (event) => {
+        explanation += JSON.parse(event.data).text;
+        setVideoData({ ...params, explanation });
+        setIsVideoLoading(false);
+      });
       
-      console.log('Learning content fetched:', response.data);
+      events.addEventListener('done', (event) => {
+        const data = JSON.parse(event.data);
+        setVideoData(data);
+        setIsVideoLoading(false);
+        closeExplanationStream();
+        console.log('Learning content fetched:', data);
+      });
+      
+      events.addEventListener('failed', (event) => {
+        setVideoError(JSON.parse(event.data).message || 'Failed to fetch learning content');
+        setIsVideoLoading(false);
+        closeExplanationStream();
+      });
+      
+      // Connection errors (the server closing the stream early, network drops)
+      events.onerror = () => {
+        if (explanationStreamRef.current !== events) return;
+        setVideoError('Failed to fetch learning content');
+        setIsVideoLoading(false);
+        closeExplanationStream();
+      };
     } catch (error) {
       setVideoError(error.response?.data?.message || 'Failed to fetch learning content');
       setIsVideoLoading(false);
@@ -339,6 +380,7 @@ const SubjectsContent = () => {
   
   // Close video modal
   const closeVideoModal = () => {
+    closeExplanationStream();
     setIsVideoModalOpen(false);
     setVideoData(null);
     setVideoError('');
@@ -529,7 +571,7 @@ const SubjectsContent = () => {
             >
               {isVideoLoading ? 'Cancel' : 'Close'}
             </button>
-            {videoData && !isVideoLoading && !videoError && (
+            {videoData && !isVideoLoading && !isVideoStreaming && !videoError && (
               <button 
                 className="px-6 py-3 bg-indigo-600 text-white rounded-lg hover:bg-indigo-700"
                 onClick={handleMarkAsComplete}